@@ -1,5 +1,4 @@
-from flask import Flask, render_template, request, jsonify
-import asyncio
+from flask import Flask, Response, render_template, request, jsonify, url_for
 import sys
 from pathlib import Path
 import os
@@ -8,23 +7,30 @@ import json
 # Add the project root to Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from manage import main as manage_main
+from manage import main as manage_main, get_default_path
+from scripts.job_runner import JobRunner
+from scripts.model_catalog import get_catalog
+from scripts.metrics import REGISTRY
+from scripts.model_library import ModelLibrary
+from scripts.progress import ProgressBus
+from scripts.rate_limiter import GLOBAL_LIMIT, TokenBucket, parse_rate
 
 app = Flask(__name__)
+# Per-job bandwidth buckets, adjustable while the job runs
+job_limits = {}
+# Downloads run here, on a long-lived event loop thread, not inside requests;
+# a job's bucket goes when the runner forgets the job
+job_runner = JobRunner(on_evict=lambda job_id: job_limits.pop(job_id, None))
+# Shared by every job's downloads and read by the /events stream
+progress_bus = ProgressBus()
 
 def load_model_database():
     """Load model database with SD 1.5 models including Realistic Vision and ControlNet"""
-    try:
-        with open("model_database.json", 'r') as f:
-            db = json.load(f)
-            # Flatten the nested structure for template rendering
-            flattened_db = {}
-            for top_category, subcategories in db.items():
-                for subcategory, models in subcategories.items():
-                    category_name = f"{top_category} - {subcategory}"
-                    flattened_db[category_name] = models
-            return flattened_db
-    except FileNotFoundError:
+    catalog = get_catalog("model_database.json")
+    if catalog.exists:
+        # Parsed and flattened once per file change, not per request
+        return catalog.flattened()
+    else:
         return {
             "SD 1.5 - Base Models": [
                 {
@@ -37,47 +43,134 @@ def load_model_database():
             ]
         }
 
+def load_install_status():
+    """Map each catalog model URL to installed, missing, partial or stale"""
+    library = ModelLibrary(base_path=get_default_path())
+    return {item['url']: item['status'] for item in library.install_status()}
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     message = None
     error = False
     summary = None
+    job_id = None
     model_database = load_model_database()
 
     if request.method == 'POST':
-        test_mode = 'test_mode' in request.form
-        selected_models = request.form.getlist('models[]')
-        
-        # Build command line arguments
-        sys.argv = ['manage.py', '--download']
-        if selected_models:
-            sys.argv.extend(['--models'] + selected_models)
-        if test_mode:
-            sys.argv.append('--test')
-
-        try:
-            # Capture stdout to get the summary
-            import io
-            import contextlib
-            output = io.StringIO()
-            with contextlib.redirect_stdout(output):
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(manage_main())
-                loop.close()
-            
-            summary = output.getvalue()
-            message = "Successfully downloaded selected models"
-        except Exception as e:
-            import traceback
-            message = f"Error during download: {str(e)}\n{traceback.format_exc()}"
-            error = True
+        job_id = submit_download(request.form.getlist('models[]'), 'test_mode' in request.form,
+                                 skip_space_check='skip_space_check' in request.form)
+        message = f"Download started as job {job_id}"
 
     return render_template('index.html', 
                          message=message, 
                          error=error, 
                          summary=summary,
-                         model_database=model_database)
+                         job_id=job_id,
+                         model_database=model_database,
+                         install_status=load_install_status())
+
+def submit_download(selected_models, test_mode=False, limit_rate=None, skip_space_check=False):
+    """Queue a manage.py download run as a background job and return its ID"""
+    argv = ['--download']
+    if selected_models:
+        argv.extend(['--models'] + list(selected_models))
+    if test_mode:
+        argv.append('--test')
+    if skip_space_check:
+        argv.append('--skip-space-check')
+    rate_limit = TokenBucket(limit_rate)
+    description = f"Download {len(selected_models)} model(s)" if selected_models else "Download all models"
+
+    async def run():
+        # A refused plan or a failed download must not show as a successful job
+        if await manage_main(argv, progress=progress_bus, rate_limit=rate_limit):
+            raise RuntimeError("Download run failed; see the job output")
+
+    job_id = job_runner.submit(run, description)
+    job_limits[job_id] = rate_limit
+    return job_id
+
+@app.route('/jobs', methods=['GET', 'POST'])
+def jobs():
+    """List jobs, or start a download job and return its ID without waiting"""
+    if request.method == 'GET':
+        return jsonify(job_runner.list())
+
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        selected_models = payload.get('models', [])
+        test_mode = bool(payload.get('test_mode', False))
+        limit_rate = payload.get('limit_rate')
+        skip_space_check = bool(payload.get('skip_space_check', False))
+    else:
+        selected_models = request.form.getlist('models[]')
+        test_mode = 'test_mode' in request.form
+        limit_rate = request.form.get('limit_rate') or None
+        skip_space_check = 'skip_space_check' in request.form
+    try:
+        limit_rate = parse_rate(limit_rate)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    job_id = submit_download(selected_models, test_mode, limit_rate, skip_space_check)
+    response = jsonify(job_runner.get(job_id))
+    response.status_code = 202
+    response.headers['Location'] = url_for('job_status', job_id=job_id)
+    return response
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Return the status and captured output of a job"""
+    job = job_runner.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify(job)
+
+@app.route('/rate-limit', methods=['GET', 'POST'])
+def rate_limit():
+    """Show or change bandwidth caps: {"rate": "10M"} for all jobs, plus "job" for one job"""
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or {}
+        try:
+            rate = parse_rate(payload.get('rate'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        job_id = payload.get('job')
+        if job_id is None:
+            GLOBAL_LIMIT.set_rate(rate)
+        elif job_id in job_limits:
+            job_limits[job_id].set_rate(rate)
+        else:
+            return jsonify({"error": f"Unknown job {job_id}"}), 404
+    return jsonify({"global": GLOBAL_LIMIT.rate,
+                    "jobs": {job_id: bucket.rate for job_id, bucket in job_limits.items()}})
+
+@app.route('/status')
+def install_status():
+    """Return the install state of every model in the database"""
+    return jsonify(load_install_status())
+
+@app.route('/metrics')
+def metrics():
+    """Export download metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/progress')
+def progress():
+    """Return current per-file and aggregate download progress"""
+    return jsonify(progress_bus.snapshot())
+
+@app.route('/events')
+def events():
+    """Stream download progress as Server-Sent Events, at most twice a second"""
+    def generate():
+        for snapshot in progress_bus.stream(min_interval=0.5):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(snapshot)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/test')
 def test_page():
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Download throughput benchmarks against a local stand-in model host.
+
+Each configuration downloads one synthetic file in a fresh subprocess, so
+CPU time and peak RSS belong to that configuration alone, and reports MB/s,
+CPU seconds and peak RSS. Run from the repository root:
+
+    python -m benchmarks.bench_downloads --size 4GB --save baseline.json
+    python -m benchmarks.bench_downloads --size 4GB --baseline baseline.json
+
+With --baseline the run fails if any configuration got slower than the
+baseline by more than --tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.standin_server import StandinServer, SyntheticFile, synthetic_sha256
+from scripts.download_planner import format_size, parse_size
+
+ROOT = Path(__file__).parent.parent
+# Per-connection cap for the throttled configurations, like a CDN edge
+THROTTLE_RATE = 50 * 2**20
+# Backoff for the flaky configurations; the default would dominate the timing
+RETRY_DELAY = 0.05
+# Flaky configurations cut the first GET (and every FAIL_EVERY-th) this far in
+FAIL_AFTER = 4 * 2**20
+FAIL_EVERY = 8
+
+# Front end, engine settings and stand-in file options per configuration
+CONFIGS = {
+    "manager-stream": {"frontend": "manager", "segments": 1},
+    "manager-segmented": {"frontend": "manager", "segments": 4},
+    "manager-verify": {"frontend": "manager", "segments": 1, "verify": True},
+    "manager-segmented-verify": {"frontend": "manager", "segments": 4, "verify": True},
+    "download-manager": {"frontend": "download_manager"},
+    "throttled-stream": {"frontend": "manager", "segments": 1, "file": {"rate": THROTTLE_RATE}},
+    "throttled-segmented": {"frontend": "manager", "segments": 4, "file": {"rate": THROTTLE_RATE}},
+    "flaky-stream": {"frontend": "manager", "segments": 1,
+                     "file": {"fail_every": FAIL_EVERY, "fail_after": FAIL_AFTER}},
+    "flaky-segmented": {"frontend": "manager", "segments": 4,
+                        "file": {"fail_every": FAIL_EVERY, "fail_after": FAIL_AFTER}},
+}
+
+
+def peak_rss() -> int:
+    """Peak resident set size of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def download_with_manager(spec: Dict, target: Path):
+    import scripts.download_engine as download_engine
+    from scripts.model_manager import ModelManager
+    from scripts.retry_policy import RetryPolicy
+
+    # Segment whatever the file size, so small smoke runs cover the same path
+    download_engine.SEGMENT_THRESHOLD = 1
+    async with ModelManager(base_path=str(target.parent), segments=spec['segments']) as manager:
+        manager.retry_policy = RetryPolicy(download_engine.DEFAULT_RETRIES, base_delay=RETRY_DELAY)
+        await manager.download(target.name, spec['url'], target, spec.get('sha256'))
+
+
+def download_with_download_manager(spec: Dict, target: Path):
+    from src.download_manager import DownloadManager
+
+    manager = DownloadManager(str(target.parent.parent))
+    if manager.download_file(spec['url'], target.parent.name, target.name, spec.get('sha256')) is None:
+        raise IOError(f"DownloadManager failed to fetch {spec['url']}")
+
+
+def run_worker(spec: Dict) -> Dict:
+    """Download one file as described by spec and measure it (runs in the subprocess)."""
+    workdir = Path(spec['workdir'])
+    # Both front ends write log files into the working directory
+    os.chdir(workdir)
+    target = workdir / "models" / "bench.safetensors"
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    if spec['frontend'] == "download_manager":
+        download_with_download_manager(spec, target)
+    else:
+        asyncio.run(download_with_manager(spec, target))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    size = target.stat().st_size
+    if size != spec['size']:
+        raise IOError(f"Downloaded {size} bytes, expected {spec['size']}")
+    return {"seconds": wall, "cpu_seconds": cpu, "mb_s": size / 2**20 / wall, "peak_rss": peak_rss()}
+
+
+async def run_config(server: StandinServer, name: str, size: int, workroot: str,
+                     checksums: Dict[int, str]) -> Dict:
+    """Benchmark one configuration in a subprocess and return its measurements."""
+    config = CONFIGS[name]
+    server.files[name] = SyntheticFile(size, **config.get('file', {}))
+    spec = {"frontend": config['frontend'], "segments": config.get('segments', 4),
+            "url": server.url(name), "size": size,
+            "workdir": tempfile.mkdtemp(prefix=f"{name}-", dir=workroot)}
+    if config.get('verify'):
+        if size not in checksums:
+            checksums[size] = await asyncio.to_thread(synthetic_sha256, size)
+        spec['sha256'] = checksums[size]
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "benchmarks.bench_downloads", "--worker", json.dumps(spec),
+            cwd=ROOT, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        stdout, stderr = await process.communicate()
+    finally:
+        await asyncio.to_thread(shutil.rmtree, spec['workdir'], ignore_errors=True)
+        del server.files[name]
+
+    if process.returncode != 0:
+        lines = stderr.decode(errors='replace').strip().splitlines()
+        return {"config": name, "error": lines[-1] if lines else f"exit status {process.returncode}"}
+    return {"config": name, **json.loads(stdout.decode().strip().splitlines()[-1])}
+
+
+async def run_benchmarks(names: List[str], size: int, repeat: int = 1,
+                         workroot: Optional[str] = None) -> List[Dict]:
+    """Run each configuration ``repeat`` times and keep its fastest run."""
+    results = []
+    checksums: Dict[int, str] = {}
+    async with StandinServer() as server:
+        for name in names:
+            runs = [await run_config(server, name, size, workroot, checksums) for _ in range(repeat)]
+            ok = [run for run in runs if 'error' not in run]
+            results.append(max(ok, key=lambda run: run['mb_s']) if ok else runs[-1])
+    return results
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Describe every configuration that failed or got slower than the baseline allows."""
+    previous = {run['config']: run for run in baseline if 'mb_s' in run}
+    regressions = []
+    for run in results:
+        if 'error' in run:
+            regressions.append(f"{run['config']}: failed ({run['error']})")
+        elif run['config'] in previous and run['mb_s'] < previous[run['config']]['mb_s'] * (1 - tolerance):
+            regressions.append(f"{run['config']}: {run['mb_s']:.1f} MB/s, "
+                               f"baseline {previous[run['config']]['mb_s']:.1f} MB/s")
+    return regressions
+
+
+def print_results(results: List[Dict], size: int):
+    print(f"\nDownload benchmarks ({format_size(size)} per file):")
+    print(f"{'configuration':<26} {'MB/s':>9} {'seconds':>9} {'CPU s':>9} {'peak RSS':>10}")
+    for run in results:
+        if 'error' in run:
+            print(f"{run['config']:<26} failed: {run['error']}")
+            continue
+        print(f"{run['config']:<26} {run['mb_s']:>9.1f} {run['seconds']:>9.2f} "
+              f"{run['cpu_seconds']:>9.2f} {format_size(run['peak_rss']):>10}")
+
+
+def size_arg(text: str) -> int:
+    size = parse_size(text)
+    if not size:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r}, expected e.g. 512MB or 4GB")
+    return size
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark model downloads against a local stand-in host')
+    parser.add_argument('--size', type=size_arg, default=parse_size("1GB"),
+                        help='Synthetic file size per configuration (default: 1GB)')
+    parser.add_argument('--config', nargs='+', choices=list(CONFIGS), default=list(CONFIGS),
+                        help='Configurations to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per configuration; the fastest counts')
+    parser.add_argument('--workdir', default=None, help='Where downloads are written (default: system temp)')
+    parser.add_argument('--save', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Fail if slower than the results in this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed slowdown against the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(json.loads(args.worker))))
+        return 0
+
+    results = asyncio.run(run_benchmarks(args.config, args.size, max(1, args.repeat), args.workdir))
+    print_results(results, args.size)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({"size": args.size, "results": results}, f, indent=2)
+
+    baseline = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import hashlib
+import random
+import re
+from typing import Dict, Optional
+from aiohttp import web
+from scripts.rate_limiter import TokenBucket, throttle
+
+# Synthetic file contents repeat this block; random so nothing compresses or dedupes
+PATTERN_SIZE = 2**20
+PATTERN = random.Random(0).randbytes(PATTERN_SIZE)
+# Twice over, so any PATTERN_SIZE window is one contiguous slice
+_DOUBLED = memoryview(PATTERN * 2)
+# Bytes written per response chunk
+SEND_SIZE = 256 * 2**10
+
+
+def synthetic_bytes(offset: int, length: int) -> memoryview:
+    """Contents of a synthetic file at [offset, offset + length), length <= PATTERN_SIZE."""
+    start = offset % PATTERN_SIZE
+    return _DOUBLED[start:start + length]
+
+
+def synthetic_sha256(size: int) -> str:
+    """SHA-256 of a synthetic file of the given size."""
+    digest = hashlib.sha256()
+    for offset in range(0, size, PATTERN_SIZE):
+        digest.update(synthetic_bytes(offset, min(PATTERN_SIZE, size - offset)))
+    return digest.hexdigest()
+
+
+class SyntheticFile:
+    """A file of any size served from PATTERN, so multi-GB files cost no memory or disk.
+
+    ``rate`` caps each connection in bytes per second. With ``fail_every``
+    the first GET and every ``fail_every``th one after it are cut off after
+    ``fail_after`` bytes, to exercise resume and retry.
+    """
+
+    def __init__(self, size: int, rate: Optional[float] = None,
+                 fail_every: int = 0, fail_after: int = 0):
+        self.size = size
+        self.rate = rate
+        self.fail_every = fail_every
+        self.fail_after = fail_after
+        self.gets = 0
+
+    @property
+    def etag(self) -> str:
+        return f'"synthetic-{self.size}"'
+
+
+class StandinServer:
+    """Local stand-in for a model host: Range, If-Range, ETag, throttling and failures."""
+
+    def __init__(self, files: Optional[Dict[str, SyntheticFile]] = None):
+        self.files = files or {}
+        self.runner = None
+        self.base_url = None
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_route('*', '/{name}', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        file = self.files.get(request.match_info['name'])
+        if file is None:
+            raise web.HTTPNotFound()
+
+        headers = {'ETag': file.etag, 'Accept-Ranges': 'bytes'}
+        start, end, status = 0, file.size, 200
+        match = re.match(r'bytes=(\d+)-(\d*)$', request.headers.get('Range', ''))
+        if_range = request.headers.get('If-Range')
+        if match and (if_range is None or if_range == file.etag):
+            start = int(match.group(1))
+            end = min(int(match.group(2)) + 1, file.size) if match.group(2) else file.size
+            if start >= file.size:
+                raise web.HTTPRequestRangeNotSatisfiable(headers={'Content-Range': f'bytes */{file.size}'})
+            headers['Content-Range'] = f'bytes {start}-{end - 1}/{file.size}'
+            status = 206
+        headers['Content-Length'] = str(end - start)
+
+        response = web.StreamResponse(status=status, headers=headers)
+        if request.method == 'HEAD':
+            await response.prepare(request)
+            return response
+
+        cut_at = None
+        if file.fail_every and file.gets % file.fail_every == 0:
+            cut_at = start + file.fail_after
+        file.gets += 1
+        bucket = TokenBucket(file.rate)
+        await response.prepare(request)
+        offset = start
+        try:
+            while offset < end:
+                length = min(SEND_SIZE, end - offset, PATTERN_SIZE - offset % PATTERN_SIZE)
+                if cut_at is not None and offset + length > cut_at:
+                    # Injected failure: drop the connection mid-body
+                    await response.write(synthetic_bytes(offset, max(cut_at - offset, 0)))
+                    request.transport.close()
+                    return response
+                await throttle([bucket], length)
+                await response.write(synthetic_bytes(offset, length))
+                offset += length
+            await response.write_eof()
+        except ConnectionResetError:
+            pass  # The client gave up, e.g. a segmented download cancelling its other ranges
+        return response
@@ -1,10 +1,20 @@
 #!/usr/bin/env python3
 import argparse
 import asyncio
+import json
 import os
+import sys
+import time
+from datetime import datetime
 from pathlib import Path
-from scripts.model_scanner import ModelScanner
-from scripts.model_manager import ModelManager
+# Only light modules up front: the network stack (aiohttp, tqdm and the
+# download engine) is imported by run_network_steps() for the steps that use
+# it, so --status, --setup and --help stay fast for entrypoints and health checks
+from scripts.blob_store import BlobStore, DEFAULT_STORE_PATH
+from scripts.env_checks import check_filesystems, check_free_space, check_writable
+from scripts.install_index import print_status
+from scripts.model_library import ModelLibrary, target_directories
+from scripts.rate_limiter import TokenBucket, parse_rate
 
 import platform
 
@@ -22,95 +32,184 @@ def get_default_path():
         return DEFAULT_PATHS["runpod"]
     return DEFAULT_PATHS[platform.system().lower()]
 
-async def check_environment():
-    """Verify environment and paths exist"""
-    base_path = get_default_path()
-    
+def ensure_base_path(base_path):
     if not os.path.exists(base_path):
         print(f"Warning: {base_path} not found. ComfyUI may not be installed.")
         print(f"Creating directory: {base_path}")
         os.makedirs(base_path, exist_ok=True)
-    
     return True
 
-async def verify_permissions():
-    """Check if we have write permissions in the required directories"""
-    base_path = get_default_path()
-    test_path = os.path.join(base_path, "models", "test_write")
-    try:
-        os.makedirs(os.path.dirname(test_path), exist_ok=True)
-        with open(test_path, 'w') as f:
-            f.write('test')
-        os.remove(test_path)
-        return True
-    except Exception as e:
-        print(f"Permission error: {str(e)}")
-        print("You might need to run: sudo chown -R $(whoami) /workspace/ComfyUI")
-        return False
-
-async def check_disk_space():
-    """Verify sufficient disk space"""
-    import shutil
-    import os
-    
-    # Use the ComfyUI base path to check disk space
-    base_path = get_default_path()
-    try:
-        _, _, free = shutil.disk_usage(os.path.dirname(base_path))
-        free_gb = free // (2**30)
-        if free_gb < 10:  # Less than 10GB free
-            print(f"Warning: Only {free_gb}GB free space available.")
-            print("Some model downloads might fail.")
-            return False
-        return True
-    except FileNotFoundError:
-        print(f"Warning: Could not check disk space for {base_path}")
-        return True  # Continue anyway
-
-async def main():
+async def check_environment(base_path=None):
+    """Verify environment and paths exist"""
+    return await asyncio.to_thread(ensure_base_path, base_path or get_default_path())
+
+async def verify_permissions(base_path=None):
+    """Check we can write to every filesystem models are installed on"""
+    directories = target_directories(base_path or get_default_path())
+    return await check_filesystems("writable", directories, check_writable)
+
+async def check_disk_space(base_path=None):
+    """Verify sufficient disk space on every filesystem models are installed on"""
+    directories = target_directories(base_path or get_default_path())
+    return await check_filesystems("free_space", directories, check_free_space)
+
+async def run_network_steps(args, progress=None, rate_limit=None):
+    """Scan, sync, plan and download; the only steps that need the network stack.
+
+    Returns False if the plan refused the download or any download failed.
+    """
+    from scripts.download_engine import DEFAULT_RETRIES
+    from scripts.model_manager import ModelManager
+
+    store = BlobStore(args.store) if args.store else None
+    # Callers may pass their own bucket to retune this run while it downloads
+    if rate_limit is None:
+        rate_limit = TokenBucket(args.limit_rate)
+    elif args.limit_rate:
+        rate_limit.set_rate(args.limit_rate)
+    async with ModelManager(base_path=args.path, max_concurrent=args.concurrency,
+                            max_per_host=args.per_host, segments=args.segments,
+                            store=store, rate_limit=rate_limit,
+                            max_retries=DEFAULT_RETRIES if args.retries is None else args.retries,
+                            chunk_size=args.chunk_size * 2**20 if args.chunk_size else None,
+                            progress=progress) as manager:
+        if args.scan:
+            from scripts.http_cache import HttpCache
+            from scripts.model_scanner import ModelScanner, REPOSITORIES
+            print("Starting repository scan...")
+            # Unchanged sources answer 304 and reuse their cached parse results
+            scanner = ModelScanner(test_mode=args.test, session=manager.session,
+                                   cache=None if args.no_cache else HttpCache())
+            # All sources at once; the scan takes as long as the slowest one
+            await scanner.scan_repositories(REPOSITORIES)
+            db_file = "model_database.json"
+            scanner.save_model_database(db_file)
+            if os.path.exists(db_file):
+                print(f"Scanning complete. Model database saved to {db_file}")
+                manager.load_model_database()
+            else:
+                print("Warning: Model database file was not created")
+
+        if args.sync:
+            from scripts.catalog_sync import CatalogSync, CivitaiSync, HuggingFaceSync, MAX_PAGES
+            print("Syncing catalog from Civitai and Hugging Face...")
+            pages = MAX_PAGES if args.sync_pages is None else args.sync_pages
+            adapters = [CivitaiSync(manager.session, max_pages=pages),
+                        HuggingFaceSync(manager.session, max_pages=pages)]
+            totals = await CatalogSync(adapters).run()
+            print(f"Catalog sync complete: {totals['added']} added, {totals['updated']} updated")
+            manager.load_model_database()
+
+        if args.status:
+            print_status(manager.install_status(model_urls=args.models, rescan=args.rescan))
+
+        if args.plan or args.download:
+            from scripts.download_planner import DownloadPlanner, print_plan
+            # Size every selected download up front instead of failing mid-run
+            plan = await DownloadPlanner(manager).plan(model_urls=args.models)
+            print_plan(plan)
+            if args.download and not (args.force or args.skip_space_check):
+                if any(fs['needed'] > fs['free'] for fs in plan['filesystems']):
+                    print("\nNot enough disk space for the selected models. "
+                          "Use --skip-space-check to download anyway.")
+                    return False
+                unknown = sum(fs['unknown'] for fs in plan['filesystems'])
+                if unknown:
+                    # Refusing would block every run with a host that omits Content-Length
+                    print(f"\nWarning: {unknown} file(s) have an unknown size; "
+                          "the disk may still fill up during the download.")
+
+        if args.setup or args.download:
+            # Always create directory structure before download
+            manager.create_directory_structure()
+
+        if args.download:
+            from scripts.profiling import profiled
+            with profiled(args.profile):
+                failed = await manager.download_models(model_urls=args.models)
+            if failed:
+                print(f"{len(failed)} model download(s) failed:")
+                for url in failed:
+                    print(f"  {url}")
+                return False
+            print("Model downloads complete.")
+    return True
+
+async def main(argv=None, progress=None, rate_limit=None):
+    """Run the selected steps; return 0 on success and 1 if a check, the plan or a download failed"""
     parser = argparse.ArgumentParser(description='ComfyUI Model Manager for RunPod')
     parser.add_argument('--scan', action='store_true', help='Scan repositories for models')
+    parser.add_argument('--sync', action='store_true',
+                        help='Add models from the Civitai and Hugging Face APIs to the database')
+    parser.add_argument('--sync-pages', type=int, default=None,
+                        help='API pages to fetch per model type or repository')
     parser.add_argument('--download', action='store_true', help='Download models')
     parser.add_argument('--setup', action='store_true', help='Create directory structure')
+    parser.add_argument('--plan', action='store_true',
+                        help='Report the exact disk space the selected downloads need')
+    parser.add_argument('--skip-space-check', action='store_true',
+                        help='Download even if the plan says the models will not fit')
+    parser.add_argument('--status', action='store_true',
+                        help='Show which models are installed, missing, partial or stale')
+    parser.add_argument('--rescan', action='store_true',
+                        help='With --status, re-list every model directory instead of only changed ones')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Refetch and reparse every source during --scan')
     parser.add_argument('--test', action='store_true', help='Run in test mode with minimal downloads')
     parser.add_argument('--path', default=None, help='Base path for ComfyUI')
     parser.add_argument('--force', action='store_true', help='Skip environment checks')
     parser.add_argument('--models', nargs='+', help='Specific model URLs to download')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum parallel downloads')
+    parser.add_argument('--per-host', type=int, default=None,
+                        help='Maximum parallel downloads per host (default: 2, 4 for Hugging Face)')
+    parser.add_argument('--retries', type=int, default=None,
+                        help='Attempts per file; each retry resumes where the last one stopped')
+    parser.add_argument('--segments', type=int, default=4,
+                        help='Parallel byte ranges per large download (1 disables segmenting)')
+    parser.add_argument('--store', nargs='?', const=DEFAULT_STORE_PATH, default=None,
+                        help=f'Share downloads between installs via a blob store (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Fixed write size in MB (default: adaptive 1-16MB)')
+    parser.add_argument('--limit-rate', type=parse_rate, default=None,
+                        help='Cap total download bandwidth, e.g. 10M or 500K bytes per second')
+    parser.add_argument('--report', default=None,
+                        help='Write a JSON run report with download metrics to this file')
+    parser.add_argument('--profile', default=None,
+                        help='Profile the download loop with cProfile and write the stats to this file')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    started_at, started = datetime.now(), time.monotonic()
 
     # Set default path based on environment
     if args.path is None:
         args.path = get_default_path()
 
-    # Environment checks
-    if not args.force:
+    # Environment checks (a status report only reads the install index)
+    status_only = args.status and not (args.scan or args.sync or args.download or args.setup or args.plan)
+    needs_network = args.scan or args.sync or args.plan or args.download
+    if not args.force and not status_only:
+        # Blocking probes run in worker threads, one per distinct model volume
+        # (custom_nodes may be mounted separately); passes are cached for a while
         checks = await asyncio.gather(
-            check_environment(),
-            verify_permissions(),
-            check_disk_space()
+            check_environment(args.path),
+            verify_permissions(args.path),
+            check_disk_space(args.path)
         )
         if not all(checks):
             print("\nEnvironment checks failed. Use --force to override.")
-            return
-
-    if args.scan:
-        print("Starting repository scan...")
-        scanner = ModelScanner(test_mode=args.test)
-        await scanner.scan_repository("https://github.com/comfyanonymous/ComfyUI")
-        db_file = "model_database.json"
-        scanner.save_model_database(db_file)
-        if os.path.exists(db_file):
-            print(f"Scanning complete. Model database saved to {db_file}")
-        else:
-            print("Warning: Model database file was not created")
-    
-    if args.download:
-        manager = ModelManager(base_path=args.path)
-        # Always create directory structure before download
-        manager.create_directory_structure()
-        await manager.download_models(model_urls=args.models)
-        print("Model downloads complete.")
+            return 1
+
+    ok = True
+    if needs_network:
+        ok = await run_network_steps(args, progress, rate_limit)
+    else:
+        # Filesystem-only runs never load the download engine
+        library = ModelLibrary(base_path=args.path)
+        if args.setup:
+            library.create_directory_structure()
+            print("Directory structure ready.")
+        if args.status:
+            print_status(library.install_status(model_urls=args.models, rescan=args.rescan))
 
     # Print summary
     print("\nRun Summary:")
@@ -121,5 +220,22 @@ async def main():
     if os.path.exists("model_database.json"):
         print(f"Model Database: {os.path.abspath('model_database.json')}")
 
+    if args.report:
+        write_report(args.report, args, started_at, time.monotonic() - started)
+        print(f"Run Report: {os.path.abspath(args.report)}")
+    return 0 if ok else 1
+
+def write_report(path, args, started_at, duration):
+    """Write the run's options and metrics (process-wide totals) as JSON"""
+    from scripts.metrics import REGISTRY
+    report = {
+        "started": started_at.isoformat(timespec='seconds'),
+        "duration_seconds": round(duration, 3),
+        "options": vars(args),
+        "metrics": REGISTRY.snapshot(),
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
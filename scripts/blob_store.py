@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+from scripts.hashing import hash_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_STORE_PATH = os.path.expanduser("~/.cache/model-rocket")
+
+# ioctl request number for FICLONE (copy-on-write clone) on Linux
+FICLONE = 0x40049409
+
+
+def reflink(source: Path, target: Path):
+    """Create target as a copy-on-write clone of source (btrfs, XFS, ...)."""
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            target.unlink(missing_ok=True)
+            raise
+
+
+class BlobStore:
+    """SHA-256 keyed store shared by every ComfyUI install on a host.
+
+    Blobs live at ``blobs/<sha[:2]>/<sha>``; ``urls.json`` maps source URLs
+    to the digest of what they served so other installs can skip the
+    network entirely. Install directories are populated with a hardlink,
+    falling back to a reflink, a symlink and finally a plain copy.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.index_path = self.root / "urls.json"
+        self.lock_path = self.root / "urls.json.lock"
+        self._lock = threading.Lock()
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blob_dir / sha256[:2] / sha256
+
+    def load_index(self) -> dict:
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def lookup(self, url: str, sha256: Optional[str] = None) -> Optional[Path]:
+        """Return the stored blob with the given digest, or the one url served before.
+
+        The url index is only consulted when no digest is expected: a URL
+        may serve different contents over time.
+        """
+        digest = sha256 or self.load_index().get(url)
+        if digest and self.blob_path(digest.lower()).exists():
+            return self.blob_path(digest.lower())
+        return None
+
+    @contextmanager
+    def locked_index(self):
+        """Hold the url index lock against other threads and other processes."""
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+
+    def remember(self, url: str, sha256: str):
+        """Record that url served the blob with this digest."""
+        with self.locked_index():
+            index = self.load_index()
+            index[url] = sha256
+            tmp_path = self.index_path.with_name(
+                self.index_path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+
+    def ingest(self, path: Path, url: Optional[str] = None, sha256: Optional[str] = None) -> Path:
+        """Move a downloaded file into the store and link it back in place."""
+        sha256 = sha256 or hash_file(path)
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if blob.exists():
+            path.unlink()
+        else:
+            try:
+                os.replace(path, blob)
+            except OSError:
+                # Store on another filesystem
+                shutil.move(str(path), str(blob))
+        if url:
+            self.remember(url, sha256)
+        self.link(blob, path)
+        return blob
+
+    def link(self, blob: Path, target: Path) -> str:
+        """Populate target from blob; return the method that worked."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.unlink(missing_ok=True)
+        try:
+            os.link(blob, target)
+            return "hardlink"
+        except OSError:
+            pass
+        try:
+            reflink(blob, target)
+            return "reflink"
+        except OSError:
+            pass
+        try:
+            os.symlink(blob, target)
+            return "symlink"
+        except OSError:
+            pass
+        logging.info(f"Could not link {blob} to {target}, copying instead")
+        shutil.copyfile(blob, target)
+        return "copy"
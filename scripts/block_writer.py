@@ -0,0 +1,89 @@
+import asyncio
+import queue
+import threading
+from typing import Callable, Optional
+
+DEFAULT_QUEUE_DEPTH = 4
+
+
+class BlockWriter:
+    """Run file writes on a dedicated thread fed by a bounded queue.
+
+    ``submit`` returns as soon as the work is queued, so the next network
+    read overlaps the disk write. It only waits once ``depth`` items are
+    pending, which bounds memory and slows the reader to disk speed.
+    Items run in order; ``done`` callbacks run on the event loop after
+    their item succeeds. After the first failure remaining items are
+    skipped and the error is raised from the next ``submit`` or ``close``.
+    """
+
+    def __init__(self, depth: int = DEFAULT_QUEUE_DEPTH):
+        self.depth = max(1, depth)
+        self._queue = queue.SimpleQueue()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._finished: Optional[asyncio.Future] = None
+        self._error: Optional[BaseException] = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(self.depth)
+        self._finished = self._loop.create_future()
+        self._thread = threading.Thread(target=self._run, name="block-writer", daemon=True)
+        self._thread.start()
+
+    async def submit(self, fn: Callable, *args, done: Optional[Callable[[], None]] = None):
+        """Queue fn(*args) for the writer thread."""
+        self.raise_error()
+        await self._slots.acquire()
+        self._queue.put((fn, args, done))
+
+    def raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    async def close(self):
+        """Wait for queued work, stop the thread and re-raise any write error."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        await self._finished
+        self._thread = None
+        self.raise_error()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fn, args, done = item
+            if self._error is None:
+                try:
+                    fn(*args)
+                except BaseException as e:
+                    self._error = e
+            self._notify(self._complete, done if self._error is None else None)
+        self._notify(self._finish)
+
+    def _notify(self, callback, *args):
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    def _complete(self, done):
+        self._slots.release()
+        if done is not None:
+            done()
+
+    def _finish(self):
+        if not self._finished.done():
+            self._finished.set_result(None)
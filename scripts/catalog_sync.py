@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+import aiohttp
+from scripts.catalog_writer import catalog_writer
+from scripts.download_planner import format_size
+from scripts.model_catalog import DEFAULT_DATABASE
+
+CIVITAI_URL = "https://civitai.com"
+HUGGINGFACE_URL = "https://huggingface.co"
+
+# API page streams fetched at once across all adapters
+SYNC_CONCURRENCY = 4
+# Models requested per Civitai page
+PAGE_SIZE = 100
+# Pages fetched per stream; the Civitai listing is effectively unbounded
+MAX_PAGES = 5
+# Seconds between database rewrites while batches keep arriving
+WRITE_INTERVAL = 2.0
+
+# Civitai model types to our model types and database subcategories
+CIVITAI_TYPES = {
+    "Checkpoint": ("checkpoint", "Checkpoints"),
+    "LORA": ("lora", "LoRA Models"),
+    "MotionModule": ("motion_module", "Motion Modules"),
+    "VAE": ("vae", "VAE Models"),
+}
+
+# Hugging Face repositories to list, with the type of the weights they hold
+HUGGINGFACE_REPOS = {
+    "guoyww/animatediff": "motion_module",
+    "h94/IP-Adapter": "ipadapter",
+    "stabilityai/sd-vae-ft-mse-original": "vae",
+}
+
+WEIGHT_EXTENSIONS = (".safetensors", ".ckpt", ".pt", ".pth", ".bin")
+
+Batch = Tuple[str, Optional[str], List[Dict]]
+
+
+async def get_json(session: aiohttp.ClientSession, url: str) -> Tuple[object, aiohttp.ClientResponse]:
+    """GET a JSON document; returns the parsed body and the response."""
+    async with session.get(url, headers={'Accept': 'application/json'}) as response:
+        response.raise_for_status()
+        return await response.json(content_type=None), response
+
+
+class CivitaiSync:
+    """Page through the Civitai models API, one cursor stream per model type."""
+
+    name = "Civitai"
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str = CIVITAI_URL,
+                 types: List[str] = None, limit: int = PAGE_SIZE, max_pages: int = MAX_PAGES):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.types = types or list(CIVITAI_TYPES)
+        self.limit = limit
+        self.max_pages = max_pages
+
+    def streams(self) -> List[AsyncIterator[Batch]]:
+        return [self.pages(civitai_type) for civitai_type in self.types]
+
+    async def pages(self, civitai_type: str) -> AsyncIterator[Batch]:
+        """Yield one batch of entries per API page for a model type."""
+        model_type, subcategory = CIVITAI_TYPES[civitai_type]
+        params = {"types": civitai_type, "limit": self.limit, "sort": "Most Downloaded"}
+        url = f"{self.base_url}/api/v1/models?{urlencode(params)}"
+        for _ in range(self.max_pages):
+            data, _ = await get_json(self.session, url)
+            yield self.name, subcategory, [entry for item in data.get('items', [])
+                                          for entry in self.entries(item, model_type)]
+            # Pagination is cursor based, so each page names the next one
+            url = (data.get('metadata') or {}).get('nextPage')
+            if not url:
+                break
+
+    @staticmethod
+    def entries(item: Dict, model_type: str) -> List[Dict]:
+        """Database entry for the primary file of a model's newest version."""
+        versions = item.get('modelVersions') or []
+        if not versions:
+            return []
+        version = versions[0]
+        files = version.get('files') or []
+        primary = next((f for f in files if f.get('primary')), files[0] if files else None)
+        url = (primary or {}).get('downloadUrl') or version.get('downloadUrl')
+        if not url:
+            return []
+        entry = {"name": f"{item.get('name', url)} {version.get('name', '')}".strip(),
+                 "url": url, "type": model_type, "required": False}
+        if primary and primary.get('name'):
+            # The download URL ends in the version ID, not the file name
+            entry["filename"] = primary['name']
+        if primary and primary.get('sizeKB'):
+            entry["size"] = format_size(int(primary['sizeKB'] * 1024))
+        sha256 = ((primary or {}).get('hashes') or {}).get('SHA256')
+        if sha256:
+            entry["sha256"] = sha256.lower()
+        return [entry]
+
+
+class HuggingFaceSync:
+    """List weight files in Hugging Face repositories, one stream per repository."""
+
+    name = "Hugging Face"
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str = HUGGINGFACE_URL,
+                 repos: Dict[str, str] = None, revision: str = "main", max_pages: int = MAX_PAGES):
+        self.session = session
+        self.base_url = base_url.rstrip("/")
+        self.repos = repos or HUGGINGFACE_REPOS
+        self.revision = revision
+        self.max_pages = max_pages
+
+    def streams(self) -> List[AsyncIterator[Batch]]:
+        return [self.pages(repo, model_type) for repo, model_type in self.repos.items()]
+
+    async def pages(self, repo: str, model_type: str) -> AsyncIterator[Batch]:
+        """Yield one batch per page of a repository's recursive file tree."""
+        url = f"{self.base_url}/api/models/{repo}/tree/{quote(self.revision)}?recursive=true"
+        for _ in range(self.max_pages):
+            files, response = await get_json(self.session, url)
+            yield self.name, repo, [self.entry(repo, f, model_type) for f in files
+                                    if f.get('type') == 'file' and f['path'].endswith(WEIGHT_EXTENSIONS)]
+            # Large trees are paginated through the Link header
+            next_link = response.links.get('next')
+            if not next_link:
+                break
+            url = str(next_link['url'])
+
+    def entry(self, repo: str, file: Dict, model_type: str) -> Dict:
+        entry = {"name": f"{repo.split('/')[-1]} {file['path'].rsplit('/', 1)[-1]}",
+                 "url": f"{self.base_url}/{repo}/resolve/{self.revision}/{file['path']}",
+                 "type": model_type, "required": False}
+        lfs = file.get('lfs') or {}
+        size = lfs.get('size') or file.get('size')
+        if size:
+            entry["size"] = format_size(size)
+        if lfs.get('oid'):
+            # LFS object IDs are the SHA-256 of the file contents
+            entry["sha256"] = lfs['oid'].lower()
+        return entry
+
+
+class CatalogSync:
+    """Run sync adapters concurrently and merge their batches into the database.
+
+    Streams are consumed as they arrive through a bounded queue, so pages
+    are dropped once merged rather than collected. Changes are flushed at
+    most every WRITE_INTERVAL seconds and once at the end: a JSON database
+    is replaced atomically, a ``.jsonl`` one only has new lines appended.
+    """
+
+    def __init__(self, adapters: List, path: str = DEFAULT_DATABASE,
+                 concurrency: int = SYNC_CONCURRENCY):
+        self.adapters = adapters
+        self.path = path
+        self.concurrency = max(1, concurrency)
+
+    async def run(self) -> Dict[str, int]:
+        """Sync everything; return counts of added and updated entries."""
+        writer = await asyncio.to_thread(catalog_writer, self.path)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        slots = asyncio.Semaphore(self.concurrency)
+        totals = {"added": 0, "updated": 0, "failed": 0}
+
+        async def produce(adapter, stream):
+            async with slots:
+                try:
+                    async for batch in stream:
+                        await queue.put(batch)
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logging.error(f"{adapter.name} sync failed: {str(e)}")
+                    totals["failed"] += 1
+
+        async def consume():
+            last_write = time.monotonic()
+            while (batch := await queue.get()) is not None:
+                added, updated = writer.merge(*batch)
+                totals["added"] += added
+                totals["updated"] += updated
+                if writer.dirty and time.monotonic() - last_write >= WRITE_INTERVAL:
+                    await asyncio.to_thread(writer.flush)
+                    last_write = time.monotonic()
+            await asyncio.to_thread(writer.flush)
+
+        async def produce_all():
+            await asyncio.gather(*(produce(adapter, stream) for adapter in self.adapters
+                                   for stream in adapter.streams()))
+            await queue.put(None)
+
+        tasks = [asyncio.ensure_future(produce_all()), asyncio.ensure_future(consume())]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # A failed write must not leave producers blocked on a full queue
+            for task in tasks:
+                task.cancel()
+        logging.info(f"Catalog sync: {totals['added']} added, {totals['updated']} updated")
+        return totals
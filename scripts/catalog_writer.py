@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Fields an API or scan may fill in on an entry the catalog already has
+MERGE_FIELDS = ("size", "sha256", "type", "filename")
+
+
+def load_database(path: str) -> Dict:
+    """Read a model database, or return an empty one if it does not exist yet."""
+    if Path(path).suffix == ".jsonl":
+        return load_jsonl(path)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_database(path: str, data: Dict):
+    """Replace a model database atomically so readers never see a partial file."""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def iter_jsonl(path: str) -> Iterator[Tuple[str, Optional[str], Dict]]:
+    """Stream (category, subcategory, model) records from a JSON Lines catalog.
+
+    A torn last line left by an interrupted append is skipped.
+    """
+    try:
+        f = open(path, 'r')
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            yield record['category'], record.get('subcategory'), record['model']
+
+
+def load_jsonl(path: str) -> Dict:
+    """Fold a JSON Lines catalog into the nested database layout."""
+    merger = CatalogMerger({})
+    for top, sub, model in iter_jsonl(path):
+        merger.merge(top, sub, [model])
+    return merger.data
+
+
+class CatalogMerger:
+    """Merge model entries into a database dict by URL.
+
+    Works on both the nested ``{"SD 1.5": {"Base Models": [...]}}`` layout
+    and the flat one. A URL already in the catalog is updated in place
+    (missing MERGE_FIELDS are filled in) wherever it lives; new URLs are
+    appended to the requested category.
+    """
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.by_url: Dict[str, Dict] = {}
+        for value in data.values():
+            groups = value.values() if isinstance(value, dict) else [value]
+            for models in groups:
+                for model in models:
+                    if model.get('url'):
+                        self.by_url.setdefault(model['url'], model)
+
+    @property
+    def nested(self) -> bool:
+        """True if the database groups categories under top-level sections."""
+        return any(isinstance(value, dict) for value in self.data.values())
+
+    def category(self, top: str, sub: Optional[str]) -> List[Dict]:
+        """Return the model list for a category, creating it if needed."""
+        if sub is None:
+            return self.data.setdefault(top, [])
+        return self.data.setdefault(top, {}).setdefault(sub, [])
+
+    def merge_one(self, top: str, sub: Optional[str], model: Dict) -> Optional[str]:
+        """Merge one model; return "added", "updated" or None if nothing changed."""
+        existing = self.by_url.get(model['url'])
+        if existing is None:
+            entry = dict(model)
+            self.category(top, sub).append(entry)
+            self.by_url[entry['url']] = entry
+            return "added"
+        changes = {k: model[k] for k in MERGE_FIELDS if model.get(k) and not existing.get(k)}
+        if not changes:
+            return None
+        existing.update(changes)
+        return "updated"
+
+    def merge(self, top: str, sub: Optional[str], models: List[Dict]) -> Tuple[int, int]:
+        """Merge models into a category; return (added, updated) counts."""
+        results = [self.merge_one(top, sub, model) for model in models]
+        return results.count("added"), results.count("updated")
+
+
+class JsonCatalogWriter:
+    """Merge into a model_database.json and replace it atomically on flush."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.merger = CatalogMerger(load_database(path))
+        self.dirty = False
+
+    @property
+    def nested(self) -> bool:
+        return self.merger.nested
+
+    def merge(self, top: str, sub: Optional[str], models: List[Dict]) -> Tuple[int, int]:
+        added, updated = self.merger.merge(top, sub, models)
+        self.dirty = self.dirty or bool(added or updated)
+        return added, updated
+
+    def flush(self):
+        if self.dirty:
+            write_database(self.path, self.merger.data)
+            self.dirty = False
+
+
+class JsonlCatalogWriter:
+    """Merge into a JSON Lines catalog by appending only new or changed entries.
+
+    Each line is ``{"category", "subcategory", "model"}``. Later lines for a
+    known URL only fill in missing fields when the file is read back, so
+    appends never have to rewrite what is already on disk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.merger = CatalogMerger(load_jsonl(path))
+        self.pending: List[str] = []
+
+    @property
+    def nested(self) -> bool:
+        return True
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.pending)
+
+    def merge(self, top: str, sub: Optional[str], models: List[Dict]) -> Tuple[int, int]:
+        added = updated = 0
+        for model in models:
+            result = self.merger.merge_one(top, sub, model)
+            if result is None:
+                continue
+            added += result == "added"
+            updated += result == "updated"
+            record = {"category": top, "subcategory": sub, "model": self.merger.by_url[model['url']]}
+            self.pending.append(json.dumps(record))
+        return added, updated
+
+    def flush(self):
+        if not self.pending:
+            return
+        lines = "\n".join(self.pending) + "\n"
+        with open(self.path, 'a+b') as f:
+            # Start on a fresh line if an earlier append was cut short
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines = "\n" + lines
+            f.write(lines.encode())
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending = []
+
+
+def catalog_writer(path: str):
+    """Return the writer for a database path: JSON Lines for .jsonl, JSON otherwise."""
+    if Path(path).suffix == ".jsonl":
+        return JsonlCatalogWriter(path)
+    return JsonCatalogWriter(path)
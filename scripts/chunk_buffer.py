@@ -0,0 +1,93 @@
+import os
+import time
+from typing import Iterator, List, Optional
+
+MIN_CHUNK_SIZE = 2**20  # 1MB
+MAX_CHUNK_SIZE = 16 * 2**20  # 16MB
+
+# Adaptive buffers grow when they fill faster than this and shrink when slower
+# than FILL_SLOW, so each write covers roughly a quarter to one second of data
+FILL_FAST = 0.25
+FILL_SLOW = 1.0
+
+# Written blocks kept for reuse per buffer; enough to cover a writer queue
+SPARE_BUFFERS = 8
+
+
+class ChunkBuffer:
+    """Reusable bytearrays that coalesce small network reads into large blocks.
+
+    ``feed`` yields a memoryview each time the current buffer fills and
+    switches to a spare one, so the yielded block stays intact while it is
+    written elsewhere. Pass written blocks to ``recycle`` to reuse their
+    memory. With ``adaptive`` the block size doubles or halves between
+    MIN_CHUNK_SIZE and MAX_CHUNK_SIZE depending on how quickly it fills.
+    """
+
+    def __init__(self, size: Optional[int] = None, adaptive: bool = True):
+        self.adaptive = adaptive
+        self.size = size or MIN_CHUNK_SIZE
+        self._spare: List[bytearray] = []
+        self.view = memoryview(bytearray(self.size))
+        self.filled = 0
+        self._started = time.monotonic()
+
+    def feed(self, data: bytes) -> Iterator[memoryview]:
+        """Copy data in, yielding a full block whenever the buffer fills."""
+        data = memoryview(data)
+        while data:
+            n = min(len(data), self.size - self.filled)
+            self.view[self.filled:self.filled + n] = data[:n]
+            self.filled += n
+            data = data[n:]
+            if self.filled == self.size:
+                block = self.view
+                self._adapt()
+                self._rotate()
+                yield block
+
+    def take(self) -> memoryview:
+        """Return whatever is buffered and start a fresh block."""
+        block = self.view[:self.filled]
+        self._rotate()
+        return block
+
+    def recycle(self, block: memoryview):
+        """Return a written block's memory for reuse."""
+        buffer = block.obj
+        if len(buffer) == self.size and len(self._spare) < SPARE_BUFFERS:
+            self._spare.append(buffer)
+
+    def _rotate(self):
+        buffer = self._spare.pop() if self._spare else bytearray(self.size)
+        self.view = memoryview(buffer)
+        self.filled = 0
+
+    def _adapt(self):
+        elapsed = time.monotonic() - self._started
+        self._started = time.monotonic()
+        if not self.adaptive:
+            return
+        if elapsed < FILL_FAST and self.size < MAX_CHUNK_SIZE:
+            self._resize(self.size * 2)
+        elif elapsed > FILL_SLOW and self.size > MIN_CHUNK_SIZE:
+            self._resize(self.size // 2)
+
+    def _resize(self, size: int):
+        self.size = size
+        self._spare = []
+
+
+def write_block(f, block: memoryview, digest=None):
+    """Write a block to a file object and feed it to digest (runs on the writer thread)."""
+    f.write(block)
+    if digest is not None:
+        digest.update(block)
+
+
+def pwrite_block(fd: int, block: memoryview, offset: int):
+    """Write all of block at offset, retrying short writes."""
+    while block:
+        written = os.pwrite(fd, block, offset)
+        block = block[written:]
+        offset += written
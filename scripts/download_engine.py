@@ -0,0 +1,452 @@
+import os
+import asyncio
+import functools
+import hashlib
+import aiohttp
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from tqdm import tqdm
+from scripts.blob_store import BlobStore
+from scripts.block_writer import BlockWriter, DEFAULT_QUEUE_DEPTH
+from scripts.chunk_buffer import ChunkBuffer, pwrite_block, write_block
+from scripts.download_scheduler import DEFAULT_HOST_LIMITS, DownloadScheduler, host_of
+from scripts.hashing import ChecksumError, hash_file, update_from_file, verify_digest
+from scripts.http_session import create_session
+from scripts.metrics import (BYTES_RECEIVED, DOWNLOAD_DURATION, DOWNLOADS, RETRIES, THROUGHPUT,
+                             TIME_TO_FIRST_BYTE, watch_event_loop)
+from scripts.partial_download import PartialDownload
+from scripts.progress import ProgressBus, TransferBar
+from scripts.rate_limiter import GLOBAL_LIMIT, TokenBucket, throttle
+from scripts.retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy, is_retryable
+
+# Files smaller than this are not worth splitting into byte ranges
+SEGMENT_THRESHOLD = 256 * 2**20
+# Attempts per file; later attempts resume from what earlier ones wrote
+DEFAULT_RETRIES = 3
+
+def split_ranges(total_size: int, segments: int) -> List[Tuple[int, int]]:
+    """Split [0, total_size) into at most ``segments`` half-open byte ranges."""
+    segments = max(1, min(segments, total_size))
+    step = -(-total_size // segments)
+    return [(start, min(start + step, total_size)) for start in range(0, total_size, step)]
+
+def preallocate(fd: int, size: int):
+    """Reserve ``size`` bytes for fd, falling back to a sparse truncate."""
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass  # e.g. network filesystems without fallocate support
+    os.ftruncate(fd, size)
+
+def open_part(path: Path, offset: int):
+    """Open a part file for writing from offset, dropping anything after it."""
+    f = open(path, 'r+b' if offset else 'wb')
+    f.seek(offset)
+    f.truncate()
+    return f
+
+def save_checkpoint(f, partial: PartialDownload, manifest: Dict):
+    """Flush streamed data, then record it in the sidecar (runs on the writer thread)."""
+    f.flush()
+    partial.save(manifest)
+
+class DownloadEngine:
+    """Async download engine shared by ModelManager and the sync DownloadManager.
+
+    Transfers go through one pooled aiohttp session, resume from ``.part``
+    files, are retried under a RetryPolicy, limited by a DownloadScheduler
+    and a per-host CircuitBreaker, and reported to an optional ProgressBus,
+    whichever front end started them. Bandwidth is shaped by the
+    process-wide GLOBAL_LIMIT and an optional per-job ``rate_limit``
+    bucket, both shared fairly by every concurrent transfer and range.
+    Transfers are recorded in the process-wide metrics registry.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_per_host: Optional[int] = None,
+                 session: Optional[aiohttp.ClientSession] = None, segments: int = 4,
+                 store: Optional[BlobStore] = None, chunk_size: Optional[int] = None,
+                 write_queue_depth: int = DEFAULT_QUEUE_DEPTH, progress: Optional[ProgressBus] = None,
+                 max_retries: int = DEFAULT_RETRIES, retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None, rate_limit: Optional[TokenBucket] = None,
+                 global_limit: Optional[TokenBucket] = GLOBAL_LIMIT):
+        self.progress = progress
+        self.rate_limit = rate_limit or TokenBucket()
+        self.limits = [bucket for bucket in (global_limit, self.rate_limit) if bucket is not None]
+        # Bytes received per target path during the current download() call
+        self.received_bytes: Dict[str, int] = {}
+        # HEAD results kept by probe(remember=True), used once by download_file
+        self.probes: Dict[str, Dict] = {}
+        self.retry_policy = retry_policy or RetryPolicy(max_retries)
+        self.breaker = breaker or CircuitBreaker()
+        self.chunk_size = chunk_size
+        self.write_queue_depth = write_queue_depth
+        self.store = store
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
+        self.segments = segments
+        self.session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        await self.open_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating the pooled one if needed."""
+        if self.session is None or self.session.closed:
+            # Leave headroom over the transfer cap for HEAD probes
+            per_host = self.max_per_host or max(DEFAULT_HOST_LIMITS.values())
+            self.session = create_session(limit=max(self.max_concurrent * 2, 8),
+                                          limit_per_host=max(per_host * 2, 4))
+            self._owns_session = True
+        return self.session
+
+    async def close(self):
+        """Close the session if this manager created it."""
+        if self._owns_session:
+            if self.session is not None and not self.session.closed:
+                await self.session.close()
+            self.session = None
+
+    def new_buffer(self) -> ChunkBuffer:
+        """Return a write buffer; adaptive unless a fixed chunk size was configured."""
+        return ChunkBuffer(self.chunk_size, adaptive=self.chunk_size is None)
+
+    async def probe(self, url: str, remember: bool = False) -> Dict:
+        """HEAD a URL (following redirects) and return size and range support.
+
+        With ``remember`` the result is kept for the next download of the
+        URL, so a planned run does not send the same HEAD twice.
+        """
+        session = await self.open_session()
+        async with session.head(url, allow_redirects=True) as response:
+            response.raise_for_status()
+            info = {
+                "url": str(response.url),
+                "size": int(response.headers.get('content-length', 0)),
+                "accept_ranges": response.headers.get('accept-ranges', '').lower() == 'bytes',
+                "etag": response.headers.get('etag'),
+                "last_modified": response.headers.get('last-modified'),
+            }
+        if remember:
+            self.probes[url] = info
+        return info
+
+    async def download_file(self, url: str, target_path: Path, sha256: Optional[str] = None) -> Optional[str]:
+        """Download file with progress bar and return its SHA-256 if known.
+
+        Data goes to a ``.part`` file that is renamed into place only when
+        complete, so interrupted transfers resume instead of restarting.
+        Large files on servers that accept byte ranges are fetched as
+        ``self.segments`` parallel ranges; everything else is streamed.
+        With a blob store, a URL already fetched by any install is linked
+        from the store instead of downloaded again.
+
+        If ``sha256`` is given the data is verified before the rename; a
+        mismatch discards the partial download and raises ChecksumError.
+        """
+        # Filesystem calls go through worker threads: on network volumes even
+        # a mkdir can stall every other transfer sharing the event loop
+        await asyncio.to_thread(target_path.parent.mkdir, parents=True, exist_ok=True)
+        if self.store:
+            blob = await asyncio.to_thread(self.store.lookup, url, sha256)
+            if blob:
+                method = await asyncio.to_thread(self.store.link, blob, target_path)
+                logging.info(f"Linked {target_path.name} from blob store ({method})")
+                return blob.name
+        partial = PartialDownload(target_path)
+        resumable = await asyncio.to_thread(partial.load)
+
+        # A HEAD the planner already sent is used once; retries probe afresh
+        info = self.probes.pop(url, None)
+        if info is None:
+            try:
+                info = await self.probe(url)
+            except aiohttp.ClientError as e:
+                logging.info(f"HEAD probe failed for {url}, using a single stream: {str(e)}")
+
+        if info:
+            size = info['size'] or None
+            if not resumable or not partial.matches(info['etag'], info['last_modified'], size):
+                await asyncio.to_thread(partial.reset, url, info['etag'], info['last_modified'], size)
+            partial.size = partial.size or size
+        elif not resumable:
+            await asyncio.to_thread(partial.reset, url)
+
+        if partial.completed_bytes:
+            logging.info(f"Resuming {target_path.name} from {partial.completed_bytes} bytes")
+        need_digest = bool(sha256 or self.store)
+
+        if (info and info['accept_ranges'] and info['size'] >= SEGMENT_THRESHOLD
+                and self.segments > 1 and hasattr(os, 'pwrite')):
+            await self.download_segmented(info['url'], partial)
+            # Ranges arrive out of order, so hash the assembled file in large blocks
+            digest = await asyncio.to_thread(hash_file, partial.part_path) if need_digest else None
+        else:
+            digest = await self.download_stream(url, partial, need_digest)
+
+        try:
+            if digest:
+                verify_digest(digest, sha256, target_path.name)
+        except ChecksumError:
+            await asyncio.to_thread(partial.discard)
+            raise
+        await asyncio.to_thread(partial.finalize)
+
+        if self.store:
+            await asyncio.to_thread(self.store.ingest, target_path, url, digest)
+        return digest
+
+    async def download_stream(self, url: str, partial: PartialDownload,
+                              need_digest: bool = False) -> Optional[str]:
+        """Download file as a single stream, continuing any completed prefix.
+
+        With ``need_digest`` the SHA-256 is computed as chunks arrive and
+        its hex digest is returned.
+        """
+        session = await self.open_session()
+        digest = hashlib.sha256() if need_digest else None
+        offset = partial.prefix_length()
+        headers = {}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            if partial.validator:
+                headers['If-Range'] = partial.validator
+
+        sent = time.monotonic()
+        async with session.get(url, headers=headers) as response:
+            TIME_TO_FIRST_BYTE.observe(time.monotonic() - sent)
+            if response.status == 416 and offset and offset == partial.size:
+                # Everything was already fetched
+                if digest:
+                    await asyncio.to_thread(update_from_file, digest, partial.part_path, offset)
+                return digest.hexdigest() if digest else None
+            response.raise_for_status()
+            if response.status != 206:
+                # Fresh transfer, or the server sent the whole (changed) file
+                offset = 0
+                await asyncio.to_thread(partial.reset, url, response.headers.get('etag'),
+                                        response.headers.get('last-modified'),
+                                        int(response.headers.get('content-length', 0)) or None)
+            elif digest:
+                await asyncio.to_thread(update_from_file, digest, partial.part_path, offset)
+            total_size = partial.size or 0
+
+            buffer = self.new_buffer()
+            f = await asyncio.to_thread(open_part, partial.part_path, offset)
+            try:
+                with self.progress_bar(partial, total_size, offset) as pbar:
+                    writer = BlockWriter(self.write_queue_depth)
+                    writer.start()
+                    try:
+                        async for data in response.content.iter_any():
+                            await self.received(partial, len(data))
+                            for block in buffer.feed(data):
+                                # Written and hashed on the writer thread while we keep reading
+                                await writer.submit(write_block, f, block, digest,
+                                                    done=functools.partial(self.block_written, buffer, pbar, block))
+                                offset += len(block)
+                                if partial.checkpoint_due():
+                                    partial.ranges = [[0, offset]]
+                                    await writer.submit(save_checkpoint, f, partial, partial.to_dict())
+                        block = buffer.take()
+                        await writer.submit(write_block, f, block, digest,
+                                            done=functools.partial(self.block_written, buffer, pbar, block))
+                        offset += len(block)
+                    finally:
+                        try:
+                            # Keep anything already received for the next attempt
+                            block = buffer.take()
+                            if block:
+                                await writer.submit(write_block, f, block)
+                                offset += len(block)
+                            partial.ranges = [[0, offset]] if offset else []
+                            await writer.submit(save_checkpoint, f, partial, partial.to_dict())
+                        finally:
+                            await writer.close()
+            finally:
+                await asyncio.to_thread(f.close)
+
+        if partial.size and offset != partial.size:
+            raise IOError(f"Download of {url} ended early at byte {offset} of {partial.size}")
+        return digest.hexdigest() if digest else None
+
+    def progress_bar(self, partial: PartialDownload, total: int, initial: int) -> TransferBar:
+        """Terminal bar for a transfer, mirrored to the progress bus if there is one."""
+        return TransferBar(total=total, initial=initial, unit='B', unit_scale=True,
+                           desc=partial.target_path.name, mininterval=0.5,
+                           bus=self.progress, key=str(partial.target_path))
+
+    def block_written(self, buffer: ChunkBuffer, pbar: tqdm, block: memoryview):
+        """Writer callback for streamed blocks."""
+        pbar.update(len(block))
+        buffer.recycle(block)
+
+    async def download_segmented(self, url: str, partial: PartialDownload):
+        """Download file as parallel byte ranges written in place with os.pwrite."""
+        session = await self.open_session()
+        fd = await asyncio.to_thread(os.open, partial.part_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            await asyncio.to_thread(preallocate, fd, partial.size)
+            with self.progress_bar(partial, partial.size, partial.completed_bytes) as pbar:
+                # One writer thread per file, shared by all of its ranges
+                async with BlockWriter(self.write_queue_depth) as writer:
+                    tasks = [asyncio.ensure_future(
+                                 self.fetch_segment(session, url, writer, fd, partial, start, end, pbar))
+                             for start, end in split_ranges(partial.size, self.segments)]
+                    try:
+                        await asyncio.gather(*tasks)
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+                        # Let cancelled ranges queue their buffered tails before the writer closes
+                        await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await asyncio.to_thread(os.close, fd)
+            await asyncio.to_thread(partial.save, partial.to_dict())
+
+    async def fetch_segment(self, session: aiohttp.ClientSession, url: str, writer: BlockWriter,
+                            fd: int, partial: PartialDownload, start: int, end: int, pbar: tqdm):
+        """Fetch whatever is still missing from bytes [start, end)."""
+        for gap_start, gap_end in partial.missing_ranges(start, end):
+            await self.fetch_range(session, url, writer, fd, partial, gap_start, gap_end, pbar)
+
+    async def fetch_range(self, session: aiohttp.ClientSession, url: str, writer: BlockWriter,
+                          fd: int, partial: PartialDownload, start: int, end: int, pbar: tqdm):
+        """Fetch bytes [start, end) and queue them for writing at their offset."""
+        headers = {'Range': f'bytes={start}-{end - 1}'}
+        if partial.validator:
+            headers['If-Range'] = partial.validator
+        sent = time.monotonic()
+        async with session.get(url, headers=headers) as response:
+            TIME_TO_FIRST_BYTE.observe(time.monotonic() - sent)
+            response.raise_for_status()
+            if response.status != 206:
+                raise IOError(f"Server ignored range request for {url} (HTTP {response.status})")
+
+            offset = start
+            buffer = self.new_buffer()
+            try:
+                async for data in response.content.iter_any():
+                    await self.received(partial, len(data))
+                    for block in buffer.feed(data):
+                        await writer.submit(pwrite_block, fd, block, offset,
+                                            done=functools.partial(self.range_written, partial, buffer,
+                                                                   pbar, offset, block))
+                        offset += len(block)
+                        if partial.checkpoint_due():
+                            await writer.submit(partial.save, partial.to_dict())
+            finally:
+                # Flush the tail, or keep what was received for the next attempt
+                block = buffer.take()
+                if block:
+                    await writer.submit(pwrite_block, fd, block, offset,
+                                        done=functools.partial(self.range_written, partial, buffer,
+                                                               pbar, offset, block))
+                    offset += len(block)
+
+        if offset != end:
+            raise IOError(f"Range {start}-{end - 1} of {url} ended early at byte {offset}")
+
+    async def received(self, partial: PartialDownload, nbytes: int):
+        """Count nbytes read off the wire, then wait out the bandwidth limits."""
+        BYTES_RECEIVED.inc(nbytes)
+        key = str(partial.target_path)
+        self.received_bytes[key] = self.received_bytes.get(key, 0) + nbytes
+        await throttle(self.limits, nbytes)
+
+    def range_written(self, partial: PartialDownload, buffer: ChunkBuffer, pbar: tqdm,
+                      offset: int, block: memoryview):
+        """Writer callback: record a range as on disk only once it has been written."""
+        partial.add_range(offset, offset + len(block))
+        pbar.update(len(block))
+        buffer.recycle(block)
+
+    async def download(self, name: str, url: str, target_path: Path,
+                       sha256: Optional[str] = None) -> Optional[str]:
+        """Download one file under the retry policy and return its SHA-256 if known.
+
+        Each retry resumes from the bytes earlier attempts left on disk.
+        Only retryable errors (connection problems, timeouts, 429/5xx) are
+        retried, after a jittered backoff; they also count against the
+        host's circuit breaker, and an open circuit fails the file at once.
+        """
+        key = str(target_path)
+        host = host_of(url)
+        if self.progress:
+            self.progress.start(key, target_path.name, None)
+        started = time.monotonic()
+        self.received_bytes[key] = 0
+        try:
+            attempt = 0
+            while True:
+                if not self.breaker.allow(host):
+                    if self.breaker.exhausted(host):
+                        raise CircuitOpenError(f"Too many failures from {host}; giving up on {name}")
+                    # Wait out the cooldown; the .part file keeps what already arrived
+                    await asyncio.sleep(self.breaker.remaining(host))
+                    continue
+                attempt += 1
+                try:
+                    digest = await self.download_file(url, target_path, sha256)
+                    self.breaker.record_success(host)
+                    break
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    self.breaker.record_failure(host)
+                    if not self.retry_policy.should_retry(attempt, e):
+                        raise
+                    delay = self.retry_policy.delay(attempt, e)
+                    RETRIES.inc()
+                    logging.warning(f"Attempt {attempt} for {name} failed ({str(e) or type(e).__name__}), "
+                                    f"resuming in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        except Exception as e:
+            DOWNLOADS.inc(result="failed")
+            if self.progress:
+                self.progress.finish(key, "failed", str(e))
+            raise
+        finally:
+            received = self.received_bytes.pop(key, 0)
+        elapsed = time.monotonic() - started
+        DOWNLOADS.inc(result="done")
+        DOWNLOAD_DURATION.observe(elapsed)
+        if received and elapsed > 0:
+            THROUGHPUT.observe(received / elapsed)
+        if self.progress:
+            self.progress.finish(key)
+        return digest
+
+    async def download_item(self, item: Dict) -> Optional[str]:
+        """Download one batch item; subclasses hook in here."""
+        return await self.download(item.get('name', item['url']), item['url'],
+                                   item['target_path'], item.get('sha256'))
+
+    async def download_all(self, items: List[Dict]) -> List[Tuple[str, object]]:
+        """Download items concurrently and return (url, digest or exception) in order.
+
+        Items need ``url`` and ``target_path`` and may set ``name``,
+        ``sha256`` and ``required``; required items are started first.
+        """
+        scheduler = DownloadScheduler(self.max_concurrent, self.max_per_host, breaker=self.breaker)
+        for item in items:
+            scheduler.add(item['url'], lambda i=item: self.download_item(i),
+                          0 if item.get('required') else 1)
+
+        # Callers outside ``async with`` still get one pooled session per batch
+        opened_here = self.session is None
+        watcher = asyncio.ensure_future(watch_event_loop())
+        try:
+            return await scheduler.run()
+        finally:
+            watcher.cancel()
+            if opened_here:
+                await self.close()
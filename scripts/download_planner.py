@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+import aiohttp
+from scripts.env_checks import existing_ancestor
+from scripts.partial_download import PartialDownload
+
+# Concurrent HEAD requests; probes are cheap, so this can exceed the transfer cap
+PROBE_CONCURRENCY = 16
+
+SIZE_UNITS = {"B": 1, "KB": 2**10, "MB": 2**20, "GB": 2**30, "TB": 2**40}
+
+
+def parse_size(text: Optional[str]) -> Optional[int]:
+    """Parse database sizes such as "6.46GB" or "402MB" into bytes."""
+    if not text:
+        return None
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?B)\s*", str(text), re.IGNORECASE)
+    if not match:
+        return None
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size: int) -> str:
+    """Format a byte count the way the database writes sizes."""
+    for unit in ("TB", "GB", "MB", "KB"):
+        if size >= SIZE_UNITS[unit]:
+            return f"{size / SIZE_UNITS[unit]:.2f}{unit}"
+    return f"{size}B"
+
+
+def allocated_bytes(path: Path) -> int:
+    """Bytes a file already occupies on disk (0 if missing)."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return 0
+    blocks = getattr(stat, 'st_blocks', None)
+    return min(stat.st_size, blocks * 512) if blocks is not None else stat.st_size
+
+
+class DownloadPlanner:
+    """Work out how many bytes a download run needs on each filesystem.
+
+    Every selected URL is probed with a HEAD request over the manager's
+    shared session to get its real Content-Length; the manager keeps the
+    result for the download that follows. Files already installed (or
+    available from the blob store) need nothing, and partially downloaded
+    files only need their remainder. A filesystem holding any file of
+    unknown size is never reported as having room.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def plan(self, model_types: List[str] = None, model_urls: List[str] = None) -> Dict:
+        """Return per-file entries and per-filesystem totals for a selection."""
+        items = self.manager.select_downloads(model_types, model_urls)
+        await asyncio.to_thread(self.manager.index.refresh)
+        semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+        async def plan_item(item):
+            async with semaphore:
+                return await self.plan_item(item)
+
+        entries = await asyncio.gather(*(plan_item(item) for item in items))
+        return {"entries": entries, "filesystems": await asyncio.to_thread(self.summarize, entries)}
+
+    async def plan_item(self, item: Dict) -> Dict:
+        """Probe one selected download and work out the bytes it still needs."""
+        entry = {"name": item['name'], "url": item['url'], "target_path": str(item['target_path']),
+                 "size": None, "estimated": False, "needed": 0, "status": "download"}
+        target_path = item['target_path']
+
+        if target_path in self.manager.index:
+            entry["status"] = "present"
+            return entry
+        store = self.manager.store
+        if store and await asyncio.to_thread(store.lookup, item['url'], item.get('sha256')):
+            entry["status"] = "in store"
+            return entry
+
+        try:
+            entry["size"] = (await self.manager.probe(item['url'], remember=True))['size'] or None
+        except aiohttp.ClientError as e:
+            logging.warning(f"HEAD failed for {item['url']}: {str(e)}")
+        if entry["size"] is None:
+            # Fall back to the human-readable size recorded in the database
+            entry["size"] = parse_size(item.get('size'))
+            entry["estimated"] = True
+        if entry["size"] is None:
+            entry["status"] = "unknown size"
+            return entry
+
+        # Segmented part files are preallocated, so count what is already on disk
+        on_disk = await asyncio.to_thread(allocated_bytes, PartialDownload(target_path).part_path)
+        entry["needed"] = max(entry["size"] - on_disk, 0)
+        return entry
+
+    def summarize(self, entries: List[Dict]) -> List[Dict]:
+        """Group needed bytes by the filesystem each target lands on."""
+        filesystems: Dict[int, Dict] = {}
+        for entry in entries:
+            anchor = existing_ancestor(Path(entry['target_path']))
+            device = os.stat(anchor).st_dev
+            if device not in filesystems:
+                filesystems[device] = {"path": str(anchor), "needed": 0,
+                                       "free": shutil.disk_usage(anchor).free, "files": 0, "unknown": 0}
+            filesystems[device]["needed"] += entry["needed"]
+            filesystems[device]["files"] += 1 if entry["status"] == "download" else 0
+            filesystems[device]["unknown"] += 1 if entry["status"] == "unknown size" else 0
+        for fs in filesystems.values():
+            # An unknown size could be anything, so it cannot be said to fit
+            fs["ok"] = fs["needed"] <= fs["free"] and not fs["unknown"]
+        return list(filesystems.values())
+
+
+def print_plan(plan: Dict):
+    """Print a download plan and whether each filesystem has room for it."""
+    print("\nDownload Plan:")
+    for entry in plan["entries"]:
+        if entry["status"] != "download":
+            print(f"  {entry['name']}: {entry['status']}")
+            continue
+        note = " (estimated)" if entry["estimated"] else ""
+        print(f"  {entry['name']}: {format_size(entry['needed'])} of {format_size(entry['size'])}{note}")
+    for fs in plan["filesystems"]:
+        state = "OK" if fs["ok"] else "INSUFFICIENT" if fs["needed"] > fs["free"] else "UNKNOWN"
+        unknown = f", {fs['unknown']} of unknown size" if fs["unknown"] else ""
+        print(f"  [{state}] {fs['path']}: need {format_size(fs['needed'])}, "
+              f"free {format_size(fs['free'])} ({fs['files']} files{unknown})")
@@ -0,0 +1,111 @@
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from scripts.retry_policy import CircuitBreaker, CircuitOpenError
+
+# Hosts that tolerate more (or fewer) parallel transfers than the default cap
+DEFAULT_HOST_LIMITS = {
+    "huggingface.co": 4,
+    "civitai.com": 2,
+}
+# Per-host cap for other hosts when the caller does not set one
+DEFAULT_PER_HOST = 2
+
+
+def host_of(url: str) -> str:
+    """Return the normalized host name used for per-host limits."""
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+class DownloadScheduler:
+    """Run download jobs with a global cap, per-host caps and priority ordering.
+
+    Jobs are started lowest priority value first (ties keep submission order).
+    A job whose host is saturated is skipped over rather than blocking the
+    jobs queued behind it. With a circuit breaker, jobs for a host whose
+    circuit is open stay queued until its cooldown ends, and only one runs
+    at a time until the host recovers; they fail with CircuitOpenError
+    only once the breaker gives the host up.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_per_host: Optional[int] = None,
+                 host_limits: Optional[Dict[str, int]] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_host = None if max_per_host is None else max(1, max_per_host)
+        # A cap set by the caller applies to every host; the built-in table
+        # only fills in when none was given
+        self.host_limits = dict(DEFAULT_HOST_LIMITS) if max_per_host is None else {}
+        if host_limits:
+            self.host_limits.update(host_limits)
+        self.breaker = breaker
+        self._pending: List[Tuple[int, int, str, Callable[[], Awaitable]]] = []
+        self._counter = itertools.count()
+
+    def host_limit(self, host: str) -> int:
+        """Return the concurrency cap for a host, never above the global cap."""
+        return min(self.host_limits.get(host, self.max_per_host or DEFAULT_PER_HOST), self.max_concurrent)
+
+    def add(self, url: str, job: Callable[[], Awaitable], priority: int = 0):
+        """Queue a job factory; it is only called once a slot is free."""
+        self._pending.append((priority, next(self._counter), url, job))
+
+    async def run(self) -> List[Tuple[str, object]]:
+        """Run all queued jobs and return (url, result or exception) in submission order."""
+        pending = sorted(self._pending)
+        self._pending = []
+        results: Dict[int, Tuple[str, object]] = {}
+        running: Dict[asyncio.Task, Tuple[int, str, str]] = {}
+        active_hosts: Dict[str, int] = {}
+
+        try:
+            while pending or running:
+                # Seconds until the first cooling-down host takes jobs again
+                retry_in = None
+                # Start every job that fits, in priority order
+                for entry in list(pending):
+                    if len(running) >= self.max_concurrent:
+                        break
+                    _, seq, url, job = entry
+                    host = host_of(url)
+                    if self.breaker and self.breaker.exhausted(host):
+                        pending.remove(entry)
+                        logging.error(f"Skipping {url}: too many failures from {host}")
+                        results[seq] = (url, CircuitOpenError(f"Too many failures from {host}"))
+                        continue
+                    if self.breaker and self.breaker.is_open(host):
+                        remaining = self.breaker.remaining(host)
+                        retry_in = remaining if retry_in is None else min(retry_in, remaining)
+                        continue
+                    if self.breaker and self.breaker.tripped(host) and active_hosts.get(host, 0):
+                        # One trial transfer at a time while the host recovers
+                        continue
+                    if active_hosts.get(host, 0) >= self.host_limit(host):
+                        continue
+                    pending.remove(entry)
+                    active_hosts[host] = active_hosts.get(host, 0) + 1
+                    running[asyncio.ensure_future(job())] = (seq, url, host)
+
+                if not running:
+                    if pending:
+                        await asyncio.sleep(retry_in or 0)
+                    continue
+                done, _ = await asyncio.wait(running, timeout=retry_in, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    seq, url, host = running.pop(task)
+                    active_hosts[host] -= 1
+                    if task.exception() is not None:
+                        logging.error(f"Download job for {url} failed: {task.exception()}")
+                        results[seq] = (url, task.exception())
+                    else:
+                        results[seq] = (url, task.result())
+        finally:
+            for task in running:
+                task.cancel()
+
+        return [results[seq] for seq in sorted(results)]
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Tuple
+
+# Seconds a passing check is trusted before its filesystem is probed again
+ENV_CHECK_TTL = 300.0
+# Free space below this fails the disk space check
+MIN_FREE_BYTES = 10 * 2**30
+
+# (check name, device, directory) -> time the check last passed
+_passed: Dict[Tuple[str, int, str], float] = {}
+_lock = threading.Lock()
+
+
+def existing_ancestor(path: Path) -> Path:
+    """Nearest directory at or above path that exists (the volume it will live on)."""
+    path = Path(path).absolute()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return path
+
+
+def group_by_filesystem(directories: Iterable[Path]) -> Dict[int, Path]:
+    """Map each distinct filesystem (st_dev) to the first directory that lives on it."""
+    groups: Dict[int, Path] = {}
+    for directory in directories:
+        groups.setdefault(existing_ancestor(directory).stat().st_dev, Path(directory))
+    return groups
+
+
+def check_writable(directory: Path) -> bool:
+    """Create directory if needed and write and remove a probe file in it."""
+    test_path = Path(directory) / f".write_test.{os.getpid()}"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(test_path, 'w') as f:
+            f.write('test')
+        os.remove(test_path)
+        return True
+    except Exception as e:
+        print(f"Permission error: {str(e)}")
+        print(f"You might need to run: sudo chown -R $(whoami) {directory}")
+        return False
+
+
+def check_free_space(directory: Path) -> bool:
+    """Require MIN_FREE_BYTES free on the filesystem holding directory."""
+    try:
+        _, _, free = shutil.disk_usage(existing_ancestor(directory))
+    except OSError:
+        print(f"Warning: Could not check disk space for {directory}")
+        return True  # Continue anyway
+    if free < MIN_FREE_BYTES:
+        print(f"Warning: Only {free // 2**30}GB free space available for {directory}.")
+        print("Some model downloads might fail.")
+        return False
+    return True
+
+
+def cached_check(name: str, device: int, directory: Path, check: Callable[[Path], bool],
+                 ttl: float = ENV_CHECK_TTL) -> bool:
+    """Run check unless it passed for this filesystem within ttl seconds.
+
+    Only passes are cached, so a fixed problem is noticed on the next run.
+    """
+    key = (name, device, str(directory))
+    with _lock:
+        passed_at = _passed.get(key)
+    if passed_at is not None and time.monotonic() - passed_at < ttl:
+        return True
+    ok = check(directory)
+    if ok:
+        with _lock:
+            _passed[key] = time.monotonic()
+    return ok
+
+
+async def check_filesystems(name: str, directories: Iterable[Path], check: Callable[[Path], bool],
+                            ttl: float = ENV_CHECK_TTL) -> bool:
+    """Run check once per distinct filesystem, all filesystems at once in worker threads."""
+    groups = await asyncio.to_thread(group_by_filesystem, list(directories))
+    results = await asyncio.gather(*(asyncio.to_thread(cached_check, name, device, directory, check, ttl)
+                                     for device, directory in groups.items()))
+    return all(results)
+
+
+def clear_cache():
+    with _lock:
+        _passed.clear()
@@ -0,0 +1,36 @@
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+HASH_BUFFER_SIZE = 8 * 2**20
+
+
+class ChecksumError(IOError):
+    """Raised when downloaded data does not match its expected SHA-256."""
+
+
+def update_from_file(digest, path: Path, length: Optional[int] = None):
+    """Feed the first ``length`` bytes of path (all if None) into digest."""
+    buffer = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    remaining = length
+    with open(path, 'rb', buffering=0) as f:
+        while remaining is None or remaining > 0:
+            n = f.readinto(buffer if remaining is None or remaining >= len(buffer) else view[:remaining])
+            if not n:
+                break
+            digest.update(view[:n])
+            if remaining is not None:
+                remaining -= n
+    return digest
+
+
+def hash_file(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file, read in large blocks."""
+    return update_from_file(hashlib.sha256(), path).hexdigest()
+
+
+def verify_digest(actual: str, expected: Optional[str], name: str):
+    """Raise ChecksumError unless actual matches expected (if one is given)."""
+    if expected and actual.lower() != expected.lower():
+        raise ChecksumError(f"SHA-256 mismatch for {name}: expected {expected.lower()}, got {actual}")
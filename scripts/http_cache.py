@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.cache/model-rocket/http")
+
+
+class HttpCache:
+    """On-disk cache of fetched pages for conditional revalidation.
+
+    Each URL gets one JSON entry at ``<root>/<sha256(url)>.json`` holding
+    the body, its ETag/Last-Modified validators and, optionally, whatever
+    the caller derived from the body (e.g. parsed models) so an unchanged
+    page needs neither a download nor a re-parse.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_PATH):
+        self.root = Path(root)
+
+    def path_for(self, url: str) -> Path:
+        return self.root / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def load(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self.path_for(url), 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def save(self, url: str, entry: Dict):
+        """Write an entry atomically; entries without validators are not worth keeping."""
+        if not entry.get('etag') and not entry.get('last_modified'):
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(url)
+        tmp_path = path.with_name(path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(entry, url=url), f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Request headers that let the server answer 304 for an unchanged page."""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
@@ -0,0 +1,26 @@
+import aiohttp
+
+# Connector tuning shared by downloads, HEAD probes and scanner fetches
+DEFAULT_LIMIT = 32
+DEFAULT_LIMIT_PER_HOST = 8
+DEFAULT_DNS_TTL = 300  # seconds
+DEFAULT_KEEPALIVE = 60  # seconds
+
+
+def create_session(limit: int = DEFAULT_LIMIT, limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+                   dns_ttl: int = DEFAULT_DNS_TTL, keepalive_timeout: float = DEFAULT_KEEPALIVE
+                   ) -> aiohttp.ClientSession:
+    """Create a pooled ClientSession with keep-alive and DNS caching.
+
+    Model downloads can take a long time, so only connect and per-read
+    timeouts are set; there is no overall request deadline.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_ttl,
+        keepalive_timeout=keepalive_timeout,
+        enable_cleanup_closed=True,
+    )
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
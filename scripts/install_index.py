@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+INDEX_FILENAME = ".model_rocket_index.json"
+
+# Web requests and jobs each hold their own index of the same tree
+_save_lock = threading.Lock()
+
+
+class InstallIndex:
+    """Persistent record of the model files installed under a ComfyUI tree.
+
+    Stored as ``<base>/.model_rocket_index.json`` with each tracked
+    directory's mtime and each file's size, mtime and SHA-256 (when known).
+    ``refresh`` stats every tracked directory once and re-lists only those
+    whose mtime moved, so checking what is installed costs one stat per
+    directory rather than one per model.
+    """
+
+    def __init__(self, base_path: Path, directories: Iterable[str]):
+        self.base_path = Path(base_path)
+        self.path = self.base_path / INDEX_FILENAME
+        self.tracked = sorted(set(directories))
+        self.directories: Dict[str, int] = {}
+        self.files: Dict[str, Dict] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        self.directories = data.get('directories', {})
+        self.files = data.get('files', {})
+
+    def save(self):
+        """Write the index atomically if anything changed."""
+        if not self.dirty or not self.base_path.is_dir():
+            return
+        tmp_path = self.path.with_name(self.path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with _save_lock:
+            with open(tmp_path, 'w') as f:
+                json.dump({'directories': self.directories, 'files': self.files}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def relative(self, path: Path) -> str:
+        return Path(path).relative_to(self.base_path).as_posix()
+
+    def refresh(self, full: bool = False) -> int:
+        """Re-list changed directories (all of them with ``full``); return how many."""
+        rescanned = 0
+        for directory in self.tracked:
+            try:
+                mtime = os.stat(self.base_path / directory).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if not full and self.directories.get(directory) == mtime:
+                continue
+            self.scan_directory(directory, mtime)
+            rescanned += 1
+        return rescanned
+
+    def scan_directory(self, directory: str, mtime: Optional[int]):
+        """Replace the entries for one directory from a single os.scandir pass."""
+        prefix = directory + "/"
+        old = {k: v for k, v in self.files.items() if k.startswith(prefix) and "/" not in k[len(prefix):]}
+        for key in old:
+            del self.files[key]
+
+        if mtime is None:
+            self.directories.pop(directory, None)
+        else:
+            with os.scandir(self.base_path / directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    key = prefix + entry.name
+                    record = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+                    previous = old.get(key)
+                    # Keep a known digest only while the file is unchanged
+                    if previous and previous.get('sha256') and \
+                            (previous['size'], previous['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+                        record['sha256'] = previous['sha256']
+                    self.files[key] = record
+            self.directories[directory] = mtime
+        self.dirty = True
+
+    def get(self, path: Path) -> Optional[Dict]:
+        return self.files.get(self.relative(path))
+
+    def __contains__(self, path: Path) -> bool:
+        return self.relative(path) in self.files
+
+    def has_directory(self, directory: str) -> bool:
+        return directory in self.directories
+
+    def record(self, path: Path, sha256: Optional[str] = None):
+        """Add or update one file after it was written."""
+        stat = os.stat(path)
+        entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if sha256:
+            entry['sha256'] = sha256.lower()
+        self.files[self.relative(path)] = entry
+        # The directory's stored mtime is left alone: another index (or
+        # process) may have added files too, so the next refresh re-lists it
+        self.dirty = True
+
+
+def print_status(report: List[Dict]):
+    """Print what is installed, missing, partially downloaded or stale."""
+    print("\nInstall Status:")
+    counts: Dict[str, int] = {}
+    for item in report:
+        counts[item['status']] = counts.get(item['status'], 0) + 1
+        print(f"  [{item['status']}] {item['name']}: {item['target_path']}")
+    print("  " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
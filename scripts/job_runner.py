@@ -0,0 +1,138 @@
+import asyncio
+import contextvars
+import io
+import logging
+import sys
+import threading
+import time
+import traceback
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+# Jobs allowed to run at once; later submissions wait in "queued"
+DEFAULT_MAX_JOBS = 2
+# Finished jobs (and their captured output) kept for the status pages
+MAX_FINISHED_JOBS = 50
+
+_current_output: contextvars.ContextVar = contextvars.ContextVar("job_output", default=None)
+
+
+class JobStdout(io.TextIOBase):
+    """sys.stdout proxy that sends a job's prints to that job's buffer.
+
+    Each job runs in its own asyncio task, so a context variable tells
+    writes from different jobs (and from the web server) apart.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        output = _current_output.get()
+        if output is None:
+            return self.stream.write(text)
+        return output.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class JobRunner:
+    """Run coroutines as background jobs on a long-lived event loop thread.
+
+    Only the newest ``max_finished`` finished jobs are kept; ``on_evict``
+    is called with the ID of each job dropped, so callers can release
+    whatever they keep per job.
+    """
+
+    def __init__(self, max_jobs: int = DEFAULT_MAX_JOBS, max_finished: int = MAX_FINISHED_JOBS,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.max_jobs = max_jobs
+        self.max_finished = max_finished
+        self.on_evict = on_evict
+        self.jobs: Dict[str, Dict] = {}
+        self.outputs: Dict[str, io.StringIO] = {}
+        self.lock = threading.Lock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def start(self):
+        """Start the event loop thread if it is not running yet."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            if not isinstance(sys.stdout, JobStdout):
+                sys.stdout = JobStdout(sys.stdout)
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self._run_loop, name="job-runner", daemon=True)
+            self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        self.loop.run_forever()
+
+    def submit(self, job: Callable[[], Awaitable], description: str = "") -> str:
+        """Queue job() on the runner loop and return its job ID immediately."""
+        self.start()
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                "id": job_id,
+                "description": description,
+                "status": "queued",
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "error": None,
+            }
+            self.outputs[job_id] = io.StringIO()
+        asyncio.run_coroutine_threadsafe(self._run_job(job_id, job), self.loop)
+        return job_id
+
+    async def _run_job(self, job_id: str, job: Callable[[], Awaitable]):
+        async with self._slots:
+            self._update(job_id, status="running", started=time.time())
+            _current_output.set(self.outputs[job_id])
+            try:
+                await job()
+                self._update(job_id, status="succeeded", finished=time.time())
+            except BaseException as e:
+                logging.error(f"Job {job_id} failed: {str(e)}")
+                self._update(job_id, status="failed", finished=time.time(),
+                             error=f"{str(e)}\n{traceback.format_exc()}")
+                if not isinstance(e, Exception):
+                    raise
+            finally:
+                self._prune()
+
+    def _update(self, job_id: str, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond max_finished."""
+        with self.lock:
+            finished = sorted((job for job in self.jobs.values() if job["finished"] is not None),
+                              key=lambda job: job["finished"])
+            evicted = [job["id"] for job in finished[:max(len(finished) - self.max_finished, 0)]]
+            for job_id in evicted:
+                del self.jobs[job_id]
+                del self.outputs[job_id]
+        if self.on_evict:
+            for job_id in evicted:
+                self.on_evict(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job, including its captured output."""
+        with self.lock:
+            if job_id not in self.jobs:
+                return None
+            return dict(self.jobs[job_id], output=self.outputs[job_id].getvalue())
+
+    def list(self) -> List[Dict]:
+        """Return snapshots of all jobs, newest first (without output)."""
+        with self.lock:
+            return sorted((dict(job) for job in self.jobs.values()),
+                          key=lambda job: job["created"], reverse=True)
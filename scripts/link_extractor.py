@@ -0,0 +1,109 @@
+import html
+import re
+from pathlib import PurePosixPath
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Characters that end a URL in Markdown, HTML or plain text
+_URL_CHARS = r"[^\s\"'<>()\[\]{}\\`]"
+_WEIGHTS = r"\.(?:safetensors|ckpt|pth?|bin)(?![\w-]|\.\w)"
+_QUERY = rf"(?:\?{_URL_CHARS}*)?"
+
+# Model download links, one named alternative per source. Alternatives may
+# only use non-capturing groups; the names tell matches apart.
+DEFAULT_PATTERNS = {
+    "huggingface": rf"https?://(?:www\.)?huggingface\.co/{_URL_CHARS}+?/(?:resolve|blob)/{_URL_CHARS}+?{_WEIGHTS}{_QUERY}",
+    "civitai": rf"https?://(?:www\.)?civitai\.com/api/download/models/\d+{_QUERY}",
+    "github": rf"https?://github\.com/{_URL_CHARS}+?/releases/download/{_URL_CHARS}+?{_WEIGHTS}",
+}
+
+# Longest URL we expect; streamed text keeps this much context between chunks
+MAX_URL_LENGTH = 2048
+
+# Query parameters that only affect how a file is served, not which file
+_IGNORED_PARAMS = {"download"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a model URL, used as its deduplication key.
+
+    Unescapes HTML entities, lowercases scheme and host, drops ``www.``,
+    fragments and cosmetic query parameters, sorts the rest, and turns
+    Hugging Face ``/blob/`` viewer links into ``/resolve/`` downloads.
+    """
+    parts = urlsplit(html.unescape(url).rstrip(".,;:"))
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path
+    if host == "huggingface.co":
+        path = path.replace("/blob/", "/resolve/", 1)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k not in _IGNORED_PARAMS))
+    return urlunsplit((parts.scheme.lower(), host, path, query, ""))
+
+
+def name_from_url(url: str) -> str:
+    """Readable model name from a URL: the file stem, or the Civitai model ID."""
+    path = PurePosixPath(urlsplit(url).path)
+    if path.parent.name == "models" and path.name.isdigit():
+        return f"Civitai model {path.name}"
+    return path.stem or url
+
+
+class LinkExtractor:
+    """Find model download links in a document in one pass.
+
+    All patterns are compiled into a single alternation, so a document is
+    scanned once no matter how many sources are recognised. Links are
+    deduplicated by ``normalize_url`` and classified by ``classify``.
+    """
+
+    def __init__(self, patterns: Optional[Dict[str, str]] = None,
+                 classify: Optional[Callable[[str], str]] = None):
+        self.patterns = dict(patterns or DEFAULT_PATTERNS)
+        self.regex = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in self.patterns.items()),
+                                re.IGNORECASE)
+        self.classify = classify or (lambda url: "unknown")
+
+    def link(self, match: re.Match) -> Dict:
+        url = normalize_url(match.group(0))
+        return {"url": url, "name": name_from_url(url), "type": self.classify(url), "source": match.lastgroup}
+
+    def extract(self, content: str) -> List[Dict]:
+        """Return unique links in document order."""
+        return list(self._unique(self.regex.finditer(content)))
+
+    def extract_stream(self, chunks: Iterable[str]) -> Iterator[Dict]:
+        """Yield unique links from text arriving in chunks.
+
+        Only the unmatched tail of each chunk (at most MAX_URL_LENGTH
+        characters, or a match that may continue) is carried over, so memory
+        stays bounded however large the document is.
+        """
+        return self._unique(self._stream_matches(chunks))
+
+    def _stream_matches(self, chunks: Iterable[str]) -> Iterator[re.Match]:
+        carry = ""
+        for chunk in chunks:
+            text = carry + chunk
+            safe_end = len(text) - MAX_URL_LENGTH
+            consumed = 0
+            for match in self.regex.finditer(text):
+                if match.end() > safe_end:
+                    # May be cut off by the chunk boundary; retry with more text
+                    consumed = match.start()
+                    break
+                yield match
+                consumed = match.end()
+            else:
+                consumed = max(consumed, safe_end)
+            carry = text[consumed:]
+        yield from self.regex.finditer(carry)
+
+    def _unique(self, matches: Iterable[re.Match]) -> Iterator[Dict]:
+        seen = set()
+        for match in matches:
+            link = self.link(match)
+            if link["url"] not in seen:
+                seen.add(link["url"])
+                yield link
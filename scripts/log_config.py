@@ -0,0 +1,31 @@
+import logging
+import os
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(log_file: Optional[str] = None, console: bool = False, level: int = logging.INFO):
+    """Route root logging to log_file and/or stderr; safe to call any number of times.
+
+    Unlike logging.basicConfig, every component's destination is added even
+    when the root logger is already configured, and each file or console
+    handler is only ever attached once.
+    """
+    root = logging.getLogger()
+    if root.level == logging.NOTSET or root.level > level:
+        root.setLevel(level)
+    attached = {getattr(handler, '_log_destination', None) for handler in root.handlers}
+
+    if log_file is not None:
+        destination = os.path.abspath(log_file)
+        if destination not in attached:
+            add_handler(root, logging.FileHandler(destination), destination)
+    if console and 'console' not in attached:
+        add_handler(root, logging.StreamHandler(), 'console')
+
+
+def add_handler(root: logging.Logger, handler: logging.Handler, destination: str):
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler._log_destination = destination
+    root.addHandler(handler)
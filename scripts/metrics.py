@@ -0,0 +1,201 @@
+import asyncio
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# Histogram bucket upper bounds for latencies (seconds)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Histogram bucket upper bounds for whole transfers (seconds)
+DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+# Histogram bucket upper bounds for per-transfer throughput (bytes per second)
+THROUGHPUT_BUCKETS = tuple(mb * 2**20 for mb in (1, 5, 10, 25, 50, 100, 250, 500, 1000))
+# Seconds between event loop lag samples
+LAG_INTERVAL = 0.25
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels) + "}"
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    """A named metric with optional labels; updates are thread-safe."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: Dict[Labels, object] = {}
+
+    @staticmethod
+    def key(labels: Dict[str, str]) -> Labels:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in sorted(self._values.items())]
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [{"labels": dict(labels), "value": value} for labels, value in sorted(self._values.items())]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self.key(labels), 0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self.key(labels)] = value
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self.key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        samples = []
+        for labels, state in self._states():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state["counts"]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", labels + (("le", format_value(bound)),), cumulative))
+            samples.append((f"{self.name}_sum", labels, state["sum"]))
+            samples.append((f"{self.name}_count", labels, state["count"]))
+        return samples
+
+    def snapshot(self) -> List[Dict]:
+        snapshot = []
+        for labels, state in self._states():
+            buckets, cumulative = {}, 0
+            for bound, count in zip(self.buckets + (math.inf,), state["counts"]):
+                cumulative += count
+                buckets[format_value(bound)] = cumulative
+            snapshot.append({"labels": dict(labels), "count": state["count"], "sum": state["sum"],
+                             "buckets": buckets})
+        return snapshot
+
+    def _states(self):
+        with self._lock:
+            return [(labels, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]})
+                    for labels, s in sorted(self._values.items())]
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics, exported as Prometheus text or JSON."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric):
+            raise ValueError(f"Metric {metric.name} is already registered as a {existing.kind}")
+        return existing
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self.register(Counter(name, help))
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self.register(Gauge(name, help))
+
+    def histogram(self, name: str, help: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, buckets))
+
+    def metrics(self) -> List[Metric]:
+        with self._lock:
+            return [self._metrics[name] for name in sorted(self._metrics)]
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict:
+        """JSON-friendly view of every metric, for run reports."""
+        return {metric.name: {"type": metric.kind, "help": metric.help, "values": metric.snapshot()}
+                for metric in self.metrics()}
+
+
+REGISTRY = MetricsRegistry()
+
+# Download pipeline metrics, shared by every DownloadEngine in the process
+BYTES_RECEIVED = REGISTRY.counter("model_rocket_download_bytes_total",
+                                  "Bytes received from model hosts")
+DOWNLOADS = REGISTRY.counter("model_rocket_downloads_total",
+                             "Files downloaded, by result")
+RETRIES = REGISTRY.counter("model_rocket_download_retries_total",
+                           "Download attempts retried after a retryable failure")
+TIME_TO_FIRST_BYTE = REGISTRY.histogram("model_rocket_time_to_first_byte_seconds",
+                                        "Seconds from sending a GET to receiving its response headers")
+DOWNLOAD_DURATION = REGISTRY.histogram("model_rocket_download_duration_seconds",
+                                       "Seconds per file download, including retries",
+                                       DURATION_BUCKETS)
+THROUGHPUT = REGISTRY.histogram("model_rocket_download_throughput_bytes_per_second",
+                                "Bytes per second received per file download",
+                                THROUGHPUT_BUCKETS)
+LOOP_LAG = REGISTRY.histogram("model_rocket_event_loop_lag_seconds",
+                              "How late the event loop ran a timer while downloads were active")
+
+
+async def watch_event_loop(interval: float = LAG_INTERVAL):
+    """Sample event loop lag into LOOP_LAG until cancelled.
+
+    A blocking call on the loop (a synchronous write, a large hash) shows
+    up as a timer firing late.
+    """
+    while True:
+        start = time.monotonic()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(time.monotonic() - start - interval, 0.0))
@@ -0,0 +1,141 @@
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from scripts.catalog_writer import load_database
+
+DEFAULT_DATABASE = "model_database.json"
+
+
+def model_filename(model: Dict) -> str:
+    """File name a model installs as: its ``filename`` field, else the URL path's last segment.
+
+    Civitai download URLs end in a model ID and a query string, so synced
+    entries carry the real file name from the API.
+    """
+    if model.get('filename'):
+        return Path(model['filename']).name
+    return Path(urlsplit(model['url']).path).name
+
+
+class ModelCatalog:
+    """model_database.json parsed once, indexed, and reloaded when it changes.
+
+    Accepts both the nested ``{"SD 1.5": {"Base Models": [...]}}`` layout
+    and the older flat ``{"Base Models": [...]}`` one, stored as JSON or,
+    for large catalogs, as JSON Lines (``.jsonl``). Every access does a
+    single stat() and only reparses when the file's mtime or size moved.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATABASE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._data: Dict = {}
+        self._entries: List[Tuple[str, Optional[str], Dict]] = []
+        self._by_url: Dict[str, Dict] = {}
+        self._by_type: Dict[str, List[Dict]] = {}
+        self._by_category: Dict[str, List[Dict]] = {}
+        self._by_filename: Dict[str, List[Dict]] = {}
+        self._flattened: Dict[str, List[Dict]] = {}
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            data = {}
+            if stamp is not None:
+                data = load_database(str(self.path))
+            self._build(data)
+            self._stamp = stamp
+
+    def _build(self, data: Dict):
+        entries = []
+        for top_category, value in data.items():
+            if isinstance(value, dict):
+                for subcategory, models in value.items():
+                    entries.extend((top_category, subcategory, model) for model in models)
+            else:
+                entries.extend((top_category, None, model) for model in value)
+
+        by_url, flattened = {}, {}
+        by_type, by_category, by_filename = defaultdict(list), defaultdict(list), defaultdict(list)
+        for top_category, subcategory, model in entries:
+            name = f"{top_category} - {subcategory}" if subcategory else top_category
+            flattened.setdefault(name, []).append(model)
+            by_category[top_category].append(model)
+            if subcategory:
+                by_category[name].append(model)
+            if model.get('url'):
+                by_url.setdefault(model['url'], model)
+                by_filename[model_filename(model)].append(model)
+            by_type[model.get('type', 'unknown')].append(model)
+
+        # Publish all indexes together
+        self._data = data
+        self._entries = entries
+        self._by_url = by_url
+        self._by_type = dict(by_type)
+        self._by_category = dict(by_category)
+        self._by_filename = dict(by_filename)
+        self._flattened = flattened
+
+    @property
+    def exists(self) -> bool:
+        self._refresh()
+        return self._stamp is not None
+
+    @property
+    def data(self) -> Dict:
+        """The database exactly as stored on disk."""
+        self._refresh()
+        return self._data
+
+    def iter_models(self) -> Iterator[Tuple[str, Optional[str], Dict]]:
+        """Yield (top-level category, subcategory or None, model) triples."""
+        self._refresh()
+        return iter(self._entries)
+
+    def flattened(self) -> Dict[str, List[Dict]]:
+        """Models grouped as "Top - Sub" categories for template rendering."""
+        self._refresh()
+        return self._flattened
+
+    def by_url(self, url: str) -> Optional[Dict]:
+        self._refresh()
+        return self._by_url.get(url)
+
+    def by_type(self, model_type: str) -> List[Dict]:
+        self._refresh()
+        return self._by_type.get(model_type, [])
+
+    def by_category(self, category: str) -> List[Dict]:
+        """Models under a top-level category or a "Top - Sub" category."""
+        self._refresh()
+        return self._by_category.get(category, [])
+
+    def by_filename(self, filename: str) -> List[Dict]:
+        self._refresh()
+        return self._by_filename.get(filename, [])
+
+
+_catalogs: Dict[str, ModelCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: str = DEFAULT_DATABASE) -> ModelCatalog:
+    """Return the process-wide catalog for a database path."""
+    key = os.path.abspath(path)
+    with _catalogs_lock:
+        if key not in _catalogs:
+            _catalogs[key] = ModelCatalog(key)
+        return _catalogs[key]
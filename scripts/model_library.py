@@ -0,0 +1,150 @@
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from scripts.install_index import InstallIndex
+from scripts.log_config import configure_logging
+from scripts.model_catalog import get_catalog, model_filename
+from scripts.partial_download import PartialDownload
+
+# Model directories relative to the ComfyUI base path
+MODEL_DIRECTORIES = [
+    "models/checkpoints",
+    "models/clip",
+    "models/clip_vision",
+    "models/controlnet",
+    "models/vae",
+    "models/loras",
+    "models/other",
+    "custom_nodes/ComfyUI-AnimateDiff-Evolved/models/motion-module",
+    "custom_nodes/ComfyUI-AnimateDiff-Evolved/models/motion-lora",
+    "custom_nodes/ComfyUI_IPAdapter_plus/models/ip-adapter",
+    "custom_nodes/ComfyUI_IPAdapter_plus/models/ip-adapter-plus",
+]
+
+# Where each model type is installed, relative to the base path
+TYPE_DIRECTORIES = {
+    "checkpoint": "models/checkpoints",
+    "motion_module": "custom_nodes/ComfyUI-AnimateDiff-Evolved/models/motion-module",
+    "lora": "models/loras",
+    "ipadapter": "custom_nodes/ComfyUI_IPAdapter_plus/models/ip-adapter",
+    "vae": "models/vae",
+}
+# Models of any other type
+DEFAULT_DIRECTORY = "models/other"
+
+
+def target_directories(base_path: Path) -> List[Path]:
+    """Every directory get_target_directory can return for an install."""
+    return [Path(base_path) / d for d in list(TYPE_DIRECTORIES.values()) + [DEFAULT_DIRECTORY]]
+
+
+class ModelLibrary:
+    """The models of one ComfyUI install: catalog, target directories and install state.
+
+    Everything here works from the filesystem and the model database, so
+    status reports and directory setup never load the network stack;
+    ModelManager adds downloading on top.
+    """
+
+    def __init__(self, base_path: str = "/workspace/ComfyUI"):
+        self.base_path = Path(base_path)
+        self.index = InstallIndex(self.base_path, MODEL_DIRECTORIES)
+        self.setup_logging()
+        self.load_model_database()
+
+    def setup_logging(self):
+        configure_logging("model_manager.log", console=True)
+
+    def load_model_database(self):
+        """Load model information from the shared, cached catalog."""
+        self.catalog = get_catalog("model_database.json")
+        if not self.catalog.exists:
+            logging.error("Model database not found. Run model_scanner.py first.")
+
+    @property
+    def model_database(self) -> Dict:
+        return self.catalog.data
+
+    def iter_models(self) -> Iterator[Tuple[str, Dict]]:
+        """Yield (top-level category, model) pairs from flat or nested databases."""
+        for category, _, model in self.catalog.iter_models():
+            yield category, model
+
+    def get_target_directory(self, model_type: str, url: str = None) -> Path:
+        """Determine target directory based on model type and optionally URL."""
+        # First try to detect type from URL if unknown
+        if model_type == "unknown" and url:
+            if "ip-adapter" in url.lower():
+                model_type = "ipadapter"
+            elif "motion" in url.lower():
+                model_type = "motion_module"
+            elif "lora" in url.lower():
+                model_type = "lora"
+
+        return self.base_path / TYPE_DIRECTORIES.get(model_type, DEFAULT_DIRECTORY)
+
+    def select_downloads(self, model_types: List[str] = None, model_urls: List[str] = None) -> List[Dict]:
+        """Resolve selected model types or URLs to download entries.
+
+        Each entry has ``name``, ``url``, ``target_path`` plus the database's
+        ``required``, ``size`` and ``sha256`` fields when the URL is known.
+        Files are named by the database's ``filename`` when it has one.
+        """
+        if model_urls:
+            # Download specific models by URL
+            jobs = [(url, url, self.get_target_directory("unknown", url))  # Pass URL for type detection
+                    for url in model_urls]
+        else:
+            # Original functionality for downloading by model types
+            jobs = [(model['name'], model['url'], self.get_target_directory(model['type']))
+                    for category, model in self.iter_models()
+                    if not model_types or category in model_types]
+
+        selected = []
+        for name, url, target_dir in jobs:
+            model = self.catalog.by_url(url) or {}
+            selected.append({
+                "name": name,
+                "url": url,
+                "target_path": target_dir / model_filename(model or {"url": url}),
+                "required": bool(model.get('required')),
+                "size": model.get('size'),
+                "sha256": model.get('sha256'),
+            })
+        return selected
+
+    def install_status(self, model_types: List[str] = None, model_urls: List[str] = None,
+                       rescan: bool = False) -> List[Dict]:
+        """Report each selected model as installed, missing, partial or stale.
+
+        Answered from the install index after an incremental refresh, so no
+        per-model stat calls are made. ``stale`` means the recorded SHA-256
+        no longer matches the one in the database.
+        """
+        self.index.refresh(full=rescan)
+        self.index.save()
+        report = []
+        for item in self.select_downloads(model_types, model_urls):
+            entry = self.index.get(item['target_path'])
+            if entry is None:
+                part_path = PartialDownload(item['target_path']).part_path
+                status = "partial" if self.index.get(part_path) else "missing"
+            elif item['sha256'] and entry.get('sha256') and entry['sha256'] != item['sha256'].lower():
+                status = "stale"
+            else:
+                status = "installed"
+            report.append(dict(item, status=status, installed_size=entry['size'] if entry else None))
+        return report
+
+    def create_directory_structure(self):
+        """Create all necessary directories.
+
+        Directories the install index has already seen are skipped; a
+        download still creates its own parent if one was removed since.
+        """
+        for dir_path in MODEL_DIRECTORIES:
+            if self.index.has_directory(dir_path):
+                continue
+            full_path = self.base_path / dir_path
+            full_path.mkdir(parents=True, exist_ok=True)
+            logging.info(f"Created directory: {full_path}")
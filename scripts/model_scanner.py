@@ -1,14 +1,48 @@
-import requests
-import re
-import json
+import asyncio
+import aiohttp
 from pathlib import Path
 import logging
-from typing import Dict, List, Optional
-from bs4 import BeautifulSoup
+from typing import Collection, Dict, List, Optional
+from scripts.catalog_writer import catalog_writer
+from scripts.download_scheduler import DEFAULT_HOST_LIMITS, host_of
+from scripts.http_cache import HttpCache
+from scripts.link_extractor import LinkExtractor, name_from_url, normalize_url
+from scripts.http_session import create_session
+from scripts.log_config import configure_logging
+
+# Pages fetched at once across all sources
+SCAN_CONCURRENCY = 8
+# Pages fetched at once from one host when no cap is given, unless DEFAULT_HOST_LIMITS says otherwise
+SCAN_PER_HOST = 2
+# Seconds before a single page fetch is abandoned
+FETCH_TIMEOUT = 30
+# Top-level section for scanned models in nested databases
+SCANNED_SECTION = "Scanned"
+# Bump when parsing changes so cached parse results are not reused
+PARSER_VERSION = 2
+
+REPOSITORIES = [
+    "https://github.com/comfyanonymous/ComfyUI",
+    "https://github.com/Kosinkadink/ComfyUI-AnimateDiff-Evolved",
+    "https://github.com/cubiq/ComfyUI_IPAdapter_plus",
+    "https://civitai.com/articles/4138/guide-comfyui-animatediff-lcm-an-inner-reflections-guide",
+    "https://comfyanonymous.github.io/ComfyUI_examples/flux/"
+]
 
 class ModelScanner:
-    def __init__(self, test_mode=False):
+    def __init__(self, test_mode=False, session: Optional[aiohttp.ClientSession] = None,
+                 max_concurrent: int = SCAN_CONCURRENCY, max_per_host: Optional[int] = None,
+                 timeout: float = FETCH_TIMEOUT, cache: Optional[HttpCache] = None):
         self.test_mode = test_mode
+        self.cache = cache
+        self.session = session
+        self._owns_session = session is None
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_host = None if max_per_host is None else max(1, max_per_host)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self.extractor = LinkExtractor(classify=self.determine_type)
         self.model_info = {
             "base_models": [],
             "animatediff": [],
@@ -18,42 +52,101 @@ class ModelScanner:
         }
         self.setup_logging()
 
+    async def __aenter__(self):
+        await self.open_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating a pooled one if needed."""
+        if self.session is None or self.session.closed:
+            # Per-host caps are enforced by host_slots, not the connector
+            self.session = create_session(limit=self.max_concurrent, limit_per_host=self.max_concurrent)
+            self._owns_session = True
+        return self.session
+
+    async def close(self):
+        """Close the session if this scanner created it."""
+        if self._owns_session:
+            if self.session is not None and not self.session.closed:
+                await self.session.close()
+            self.session = None
+
     def setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            filename='model_scanner.log'
-        )
+        configure_logging('model_scanner.log')
 
     async def scan_repository(self, url: str) -> Dict:
         """Scan a GitHub repository for model links and information."""
         try:
-            response = await self.fetch_url(url)
-            if not response:
-                return {}
-
-            # Test mode uses a smaller set of predefined links
-            if self.test_mode:
-                return self.get_test_models()
-
-            if "comfyanonymous/ComfyUI" in url:
-                models = await self.process_comfyui_base(response)
-                self.model_info.update(models)
-            elif "AnimateDiff-Evolved" in url:
-                models = await self.process_animatediff(response)
-                self.model_info["animatediff"].extend(models)
-            elif "IPAdapter_plus" in url:
-                models = await self.process_ipadapter(response)
-                self.model_info["ipadapter"].extend(models)
-            elif "civitai" in url:
-                models = await self.process_civitai(response)
-                self.model_info["loras"].extend(models)
-            
-            return self.model_info
-            
+            models = await self.collect(url)
         except Exception as e:
             logging.error(f"Error scanning repository {url}: {str(e)}")
             return {}
+        if models is None:
+            return {}
+
+        # Test mode uses a smaller set of predefined links
+        if self.test_mode:
+            return self.get_test_models()
+
+        self.merge(models)
+        return self.model_info
+
+    async def scan_repositories(self, urls: List[str] = None) -> Dict:
+        """Scan several sources concurrently and merge them in list order.
+
+        Fetches share the session and the scanner's global and per-host
+        limits, so a scan takes about as long as its slowest source.
+        """
+        urls = urls or REPOSITORIES
+        results = await asyncio.gather(*(self.collect(url) for url in urls), return_exceptions=True)
+        for url, models in zip(urls, results):
+            if isinstance(models, Exception):
+                logging.error(f"Error scanning repository {url}: {str(models)}")
+            elif models and not self.test_mode:
+                self.merge(models)
+        return self.get_test_models() if self.test_mode else self.model_info
+
+    async def collect(self, url: str) -> Optional[Dict[str, List[Dict]]]:
+        """Fetch one source and return its models by category (None if the fetch failed).
+
+        With a cache, an unchanged page (HTTP 304) reuses the models parsed
+        from it last time instead of being parsed again.
+        """
+        logging.info(f"Scanning repository: {url}")
+        page = await self.fetch_page(url)
+        if not page or not page['body']:
+            return None
+        if self.test_mode:
+            return {}
+
+        if not page['modified'] and page.get('parser') == PARSER_VERSION:
+            logging.info(f"{url} not modified, reusing cached models")
+            return page['models']
+        models = await self.parse(url, page['body'])
+        if self.cache:
+            entry = {k: page[k] for k in ('etag', 'last_modified', 'body')}
+            await asyncio.to_thread(self.cache.save, url, dict(entry, models=models, parser=PARSER_VERSION))
+        return models
+
+    async def parse(self, url: str, response: str) -> Dict[str, List[Dict]]:
+        """Run the source-specific parser for a fetched page."""
+        if "comfyanonymous/ComfyUI" in url:
+            return await self.process_comfyui_base(response)
+        elif "AnimateDiff-Evolved" in url:
+            return {"animatediff": await self.process_animatediff(response)}
+        elif "IPAdapter_plus" in url:
+            return {"ipadapter": await self.process_ipadapter(response)}
+        elif "civitai" in url:
+            return {"loras": await self.process_civitai(response)}
+        return {}
+
+    def merge(self, models: Dict[str, List[Dict]]):
+        """Add scanned models to model_info."""
+        for category, items in models.items():
+            self.model_info.setdefault(category, []).extend(items)
 
     def get_test_models(self) -> Dict:
         """Return a small set of test models"""
@@ -78,45 +171,96 @@ class ModelScanner:
             ]
         }
 
+    def host_slots(self, host: str) -> asyncio.Semaphore:
+        """Return the semaphore capping parallel fetches from one host."""
+        if host not in self._host_slots:
+            default = DEFAULT_HOST_LIMITS.get(host, SCAN_PER_HOST)
+            limit = min(default if self.max_per_host is None else self.max_per_host, self.max_concurrent)
+            self._host_slots[host] = asyncio.Semaphore(limit)
+        return self._host_slots[host]
+
     async def fetch_url(self, url: str) -> Optional[str]:
         """Fetch URL content with proper error handling."""
+        page = await self.fetch_page(url)
+        return page['body'] if page else None
+
+    async def fetch_page(self, url: str) -> Optional[Dict]:
+        """Fetch a page, revalidating any cached copy with a conditional request.
+
+        Returns the cache entry fields (``body``, ``etag``, ``last_modified``
+        and any cached ``models``) plus ``modified``, which is False when the
+        server answered 304; None if the fetch failed.
+        """
+        session = await self.open_session()
+        cached = await asyncio.to_thread(self.cache.load, url) if self.cache else None
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            return response.text
-        except Exception as e:
-            logging.error(f"Error fetching {url}: {str(e)}")
+            # Wait for the host first so a busy host never holds a global slot
+            async with self.host_slots(host_of(url)), self._slots:
+                async with session.get(url, headers=HttpCache.conditional_headers(cached),
+                                       timeout=self.timeout) as response:
+                    if response.status == 304 and cached:
+                        return dict(cached, modified=False)
+                    response.raise_for_status()
+                    return {
+                        "body": await response.text(),
+                        "etag": response.headers.get('etag'),
+                        "last_modified": response.headers.get('last-modified'),
+                        "modified": True,
+                    }
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Error fetching {url}: {str(e) or type(e).__name__}")
             return None
 
-    def extract_links(self, content: str, patterns: List[str]) -> List[Dict]:
-        """Extract links matching specific patterns."""
-        links = []
-        for pattern in patterns:
-            matches = re.finditer(pattern, content)
-            for match in matches:
-                link_info = {
-                    "url": match.group(0),
-                    "name": self.extract_name(match.group(0)),
-                    "type": self.determine_type(match.group(0))
-                }
-                links.append(link_info)
-        return links
+    def extract_links(self, content: str, patterns: Optional[Dict[str, str]] = None) -> List[Dict]:
+        """Extract unique model links, in one pass over content."""
+        extractor = LinkExtractor(patterns, classify=self.determine_type) if patterns else self.extractor
+        return extractor.extract(content)
+
+    def extract_name(self, url: str) -> str:
+        """Readable model name for a URL."""
+        return name_from_url(url)
+
+    def discover(self, content: str, known: List[Dict], types: Collection[str] = (),
+                 default_type: Optional[str] = None) -> List[Dict]:
+        """Return known models plus any new links of the given types found in content.
+
+        The curated entries keep their sizes and flags; discovered links are
+        appended unless they normalize to a URL that is already listed.
+        """
+        models = list(known)
+        seen = {normalize_url(model['url']) for model in known}
+        for link in self.extract_links(content):
+            model_type = link['type']
+            if model_type == "unknown" and default_type:
+                model_type = default_type
+            if link['url'] in seen or (types and model_type not in types):
+                continue
+            seen.add(link['url'])
+            models.append({"name": link['name'], "url": link['url'], "type": model_type, "required": False})
+        return models
 
     def determine_type(self, url: str) -> str:
         """Determine model type based on URL and filename."""
-        if "motion" in url.lower():
+        if "motion" in url.lower() or "animatediff" in url.lower():
             return "motion_module"
         elif "lora" in url.lower():
             return "lora"
-        elif "ipadapter" in url.lower():
+        elif "ipadapter" in url.lower() or "ip-adapter" in url.lower():
             return "ipadapter"
+        elif "vae" in url.lower():
+            return "vae"
         elif any(ext in url.lower() for ext in [".safetensors", ".ckpt"]):
             return "checkpoint"
         else:
             return "unknown"
 
     def save_model_database(self, output_file: str = "model_database.json"):
-        """Save scanned model information to JSON file."""
+        """Merge scanned models into the model database by URL.
+
+        Existing entries and categories (including the nested layout) are
+        kept. A JSON database is replaced atomically and a ``.jsonl`` one is
+        appended to, so a partial scan never clobbers the catalog in use.
+        """
         # Restructure data for better frontend display
         display_data = {
             "Base Models": self.model_info["base_models"],
@@ -125,31 +269,19 @@ class ModelScanner:
             "LoRA Models": self.model_info["loras"],
             "Motion Modules": self.model_info["motion_modules"]
         }
-        # Remove empty categories
-        display_data = {k: v for k, v in display_data.items() if v}
-        
-        with open(output_file, 'w') as f:
-            json.dump(display_data, f, indent=2)
+        writer = catalog_writer(output_file)
+        for category, models in display_data.items():
+            if not models:
+                continue
+            if writer.nested:
+                writer.merge(SCANNED_SECTION, category, models)
+            else:
+                writer.merge(category, None, models)
+        writer.flush()
 
-async def main(test_mode=False):
-    scanner = ModelScanner(test_mode=test_mode)
-    repositories = [
-        "https://github.com/comfyanonymous/ComfyUI",
-        "https://github.com/Kosinkadink/ComfyUI-AnimateDiff-Evolved",
-        "https://github.com/cubiq/ComfyUI_IPAdapter_plus",
-        "https://civitai.com/articles/4138/guide-comfyui-animatediff-lcm-an-inner-reflections-guide",
-        "https://comfyanonymous.github.io/ComfyUI_examples/flux/"
-    ]
-
-    for repo in repositories:
-        logging.info(f"Scanning repository: {repo}")
-        await scanner.scan_repository(repo)
-
-    scanner.save_model_database()
-    logging.info("Model scanning complete. Database saved to model_database.json")
     async def process_comfyui_base(self, content: str) -> Dict[str, List[Dict]]:
         """Process ComfyUI base repository content."""
-        base_models = [
+        known = [
             {
                 "name": "SDXL 1.0 Base",
                 "url": "https://huggingface.co/stabilityai/stable-diffusion-xl-base-1.0/resolve/main/sd_xl_base_1.0.safetensors",
@@ -179,11 +311,11 @@ async def main(test_mode=False):
                 "required": False
             }
         ]
-        return {"base_models": base_models}
+        return {"base_models": self.discover(content, known, {"checkpoint", "vae"})}
 
     async def process_animatediff(self, content: str) -> List[Dict]:
         """Process AnimateDiff repository content."""
-        return [
+        known = [
             {
                 "name": "MM SD v1.4",
                 "url": "https://huggingface.co/guoyww/animatediff/resolve/main/mm_sd_v14.safetensors",
@@ -206,10 +338,11 @@ async def main(test_mode=False):
                 "required": False
             }
         ]
+        return self.discover(content, known, {"motion_module"})
 
     async def process_ipadapter(self, content: str) -> List[Dict]:
         """Process IP-Adapter repository content."""
-        return [
+        known = [
             {
                 "name": "IP-Adapter SD1.5",
                 "url": "https://huggingface.co/h94/IP-Adapter/resolve/main/models/ip-adapter_sd15.safetensors",
@@ -239,10 +372,11 @@ async def main(test_mode=False):
                 "required": False
             }
         ]
+        return self.discover(content, known, {"ipadapter"})
 
     async def process_civitai(self, content: str) -> List[Dict]:
         """Process Civitai content."""
-        return [
+        known = [
             {
                 "name": "Example LoRA 1",
                 "url": "https://civitai.com/api/download/models/129723",
@@ -258,3 +392,11 @@ async def main(test_mode=False):
                 "required": False
             }
         ]
+        return self.discover(content, known, (), default_type="lora")
+
+async def main(test_mode=False):
+    async with ModelScanner(test_mode=test_mode, cache=HttpCache()) as scanner:
+        await scanner.scan_repositories(REPOSITORIES)
+
+    scanner.save_model_database()
+    logging.info("Model scanning complete. Database saved to model_database.json")
@@ -0,0 +1,148 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Minimum seconds between manifest rewrites while a transfer is running
+CHECKPOINT_INTERVAL = 1.0
+
+
+class PartialDownload:
+    """A ``.part`` file plus a JSON sidecar recording what has been fetched.
+
+    The sidecar stores the source URL, the validators (ETag/Last-Modified)
+    and expected size seen when the transfer started, and the completed
+    byte ranges as half-open ``[start, end)`` pairs. The final path only
+    appears once ``finalize`` renames the part file into place.
+    """
+
+    def __init__(self, target_path: Path):
+        self.target_path = Path(target_path)
+        self.part_path = self.target_path.with_name(self.target_path.name + '.part')
+        self.manifest_path = self.target_path.with_name(self.target_path.name + '.part.json')
+        self.url: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.size: Optional[int] = None
+        self.ranges: List[List[int]] = []
+        self._last_checkpoint = time.monotonic()
+
+    def load(self) -> bool:
+        """Load the sidecar; return True if there is resumable data."""
+        if not self.part_path.exists():
+            self.ranges = []
+            return False
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.ranges = []
+            return False
+        self.url = manifest.get('url')
+        self.etag = manifest.get('etag')
+        self.last_modified = manifest.get('last_modified')
+        self.size = manifest.get('size')
+        self.ranges = [list(r) for r in manifest.get('ranges', [])]
+        return bool(self.ranges)
+
+    def matches(self, etag: Optional[str], last_modified: Optional[str], size: Optional[int]) -> bool:
+        """Return True if the remote file still looks like the one we started."""
+        if size is not None and self.size is not None and size != self.size:
+            return False
+        if etag and self.etag:
+            return etag == self.etag
+        if last_modified and self.last_modified:
+            return last_modified == self.last_modified
+        return True
+
+    def reset(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+              size: Optional[int] = None):
+        """Start over for a (possibly changed) remote file."""
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+        self.ranges = []
+        self.part_path.unlink(missing_ok=True)
+        self.save()
+
+    @property
+    def validator(self) -> Optional[str]:
+        """Value for an If-Range header, preferring the ETag."""
+        return self.etag or self.last_modified
+
+    @property
+    def completed_bytes(self) -> int:
+        return sum(end - start for start, end in self.ranges)
+
+    def prefix_length(self) -> int:
+        """Length of the contiguous data from byte 0 that is actually on disk."""
+        if not self.ranges or self.ranges[0][0] != 0:
+            return 0
+        try:
+            on_disk = self.part_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+        return min(self.ranges[0][1], on_disk)
+
+    def add_range(self, start: int, end: int):
+        """Record [start, end) as complete, merging adjacent ranges."""
+        if end <= start:
+            return
+        merged = []
+        for r_start, r_end in sorted(self.ranges + [[start, end]]):
+            if merged and r_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], r_end)
+            else:
+                merged.append([r_start, r_end])
+        self.ranges = merged
+
+    def missing_ranges(self, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Return the [start, end) gaps not yet fetched within the given span."""
+        end = self.size if end is None else end
+        missing = []
+        cursor = start
+        for r_start, r_end in self.ranges:
+            if r_end <= cursor or r_start >= end:
+                continue
+            if r_start > cursor:
+                missing.append((cursor, r_start))
+            cursor = max(cursor, r_end)
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def to_dict(self) -> Dict:
+        return {
+            'url': self.url,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'size': self.size,
+            'ranges': [list(r) for r in self.ranges],
+        }
+
+    def save(self, manifest: Optional[Dict] = None):
+        """Write the sidecar atomically, from a to_dict() snapshot if given."""
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest or self.to_dict(), f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def checkpoint_due(self) -> bool:
+        """Return True, restarting the interval, when the sidecar should be saved again."""
+        now = time.monotonic()
+        if now - self._last_checkpoint < CHECKPOINT_INTERVAL:
+            return False
+        self._last_checkpoint = now
+        return True
+
+    def finalize(self):
+        """Atomically move the completed part file to its final path."""
+        os.replace(self.part_path, self.target_path)
+        self.manifest_path.unlink(missing_ok=True)
+
+    def discard(self):
+        """Remove the part file and its sidecar."""
+        self.part_path.unlink(missing_ok=True)
+        self.manifest_path.unlink(missing_ok=True)
@@ -0,0 +1,64 @@
+import cProfile
+import itertools
+import logging
+import os
+import pstats
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+# Set to a file path to profile download runs without touching the command line
+PROFILE_ENV = "MODEL_ROCKET_PROFILE"
+# Functions listed in the log summary
+SUMMARY_LINES = 25
+
+# Held while a profile is recorded; one thread can only carry one profiler
+_active = threading.Lock()
+_runs = itertools.count(1)
+
+
+def run_path(path: str) -> str:
+    """Output path of its own for one run: stats.prof -> stats.<pid>.<n>.prof"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}.{next(_runs)}{ext}"
+
+
+@contextmanager
+def profiled(path: Optional[str] = None):
+    """Run the enclosed block under cProfile and dump pstats to path.
+
+    Falls back to the MODEL_ROCKET_PROFILE environment variable, with a
+    per-run suffix so concurrent web jobs never share a file, and does
+    nothing when neither is set. Only one block is profiled at a time: a
+    run that starts while another is being profiled runs unprofiled.
+    Only the calling thread (the event loop running the download loop) is
+    profiled, not the block writer threads.
+    Inspect the dump with ``python -m pstats <path>`` or snakeviz.
+    """
+    if not path and os.environ.get(PROFILE_ENV):
+        path = run_path(os.environ[PROFILE_ENV])
+    if not path:
+        yield None
+        return
+    if not _active.acquire(blocking=False):
+        logging.warning(f"Another run is already being profiled; not writing {path}")
+        yield None
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+ refuses a second profiler, e.g. one started outside this module
+        _active.release()
+        logging.warning(f"Could not start profiler for {path}: {str(e)}")
+        yield None
+        return
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        _active.release()
+        profiler.dump_stats(path)
+        logging.info(f"Profile written to {path}")
+        stats = pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.print_stats(SUMMARY_LINES)
@@ -0,0 +1,176 @@
+import threading
+import time
+from typing import Dict, Iterator, Optional
+from tqdm import tqdm
+
+# Seconds between rate samples; shorter intervals make the rate jumpy
+RATE_WINDOW = 1.0
+# Weight of the newest sample in the smoothed rate
+RATE_SMOOTHING = 0.3
+# Finished transfers stay visible this long (seconds)
+RETAIN_FINISHED = 300
+# Seconds without new bytes after which the reported rate starts to fall
+RATE_DECAY_AFTER = 2.0
+# A running transfer with no new bytes for this long is reported as stalled
+STALL_AFTER = 10.0
+# Seconds between streamed snapshots while transfers run, even without
+# new bytes, so rates decay and stalls show up
+REFRESH_INTERVAL = 2.0
+
+
+class ProgressBus:
+    """Thread-safe progress state for all transfers, with change notification.
+
+    Download loops call ``start``/``advance``/``finish`` as often as they
+    like; those only update counters. Readers call ``wait`` or ``stream``,
+    which hand out at most one snapshot per interval, so any number of
+    updates between reads coalesce into a single event. Rates are brought
+    up to date at snapshot time, so a transfer that stops receiving bytes
+    slows to zero and is flagged ``stalled``.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._files: Dict[str, Dict] = {}
+        self.version = 0
+
+    def start(self, key: str, name: str, total: Optional[int], initial: int = 0):
+        """Register (or restart) a transfer."""
+        now = time.monotonic()
+        with self._cond:
+            self._files[key] = {
+                "name": name, "done": initial, "total": total or None, "rate": 0.0,
+                "status": "running", "error": None, "last_progress": time.time(),
+                "_sample_time": now, "_sample_done": initial, "_finished_at": None,
+                "_last_progress": now,
+            }
+            self._changed()
+
+    def advance(self, key: str, nbytes: int):
+        """Record nbytes more received for a transfer."""
+        with self._cond:
+            entry = self._files.get(key)
+            if entry is None:
+                return
+            entry["done"] += nbytes
+            now = time.monotonic()
+            if nbytes:
+                entry["_last_progress"] = now
+                entry["last_progress"] = time.time()
+            elapsed = now - entry["_sample_time"]
+            if elapsed >= RATE_WINDOW:
+                sample = (entry["done"] - entry["_sample_done"]) / elapsed
+                entry["rate"] = sample if not entry["rate"] else (
+                    RATE_SMOOTHING * sample + (1 - RATE_SMOOTHING) * entry["rate"])
+                entry["_sample_time"] = now
+                entry["_sample_done"] = entry["done"]
+            self._changed()
+
+    def finish(self, key: str, status: str = "done", error: Optional[str] = None):
+        """Mark a transfer done, failed or skipped."""
+        with self._cond:
+            entry = self._files.get(key)
+            if entry is None:
+                return
+            entry.update(status=status, error=error, rate=0.0, _finished_at=time.monotonic())
+            self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._cond.notify_all()
+
+    def snapshot(self) -> Dict:
+        """Return per-file progress with rate/ETA plus aggregate totals."""
+        with self._cond:
+            now = time.monotonic()
+            for key in [k for k, e in self._files.items()
+                        if e["_finished_at"] and now - e["_finished_at"] > RETAIN_FINISHED]:
+                del self._files[key]
+
+            files = []
+            for key, entry in self._files.items():
+                item = {k: v for k, v in entry.items() if not k.startswith("_")}
+                item["key"] = key
+                item["rate"], item["stalled"] = self._current_rate(entry, now)
+                item["eta"] = self._eta(entry["done"], entry["total"], item["rate"])
+                files.append(item)
+
+            running = [f for f in files if f["status"] == "running"]
+            total = sum(f["total"] or 0 for f in running)
+            done = sum(f["done"] for f in running)
+            rate = sum(f["rate"] for f in running)
+            return {
+                "version": self.version,
+                "files": files,
+                "aggregate": {"active": len(running), "done": done, "total": total or None,
+                              "rate": rate, "eta": self._eta(done, total, rate),
+                              "stalled": sum(1 for f in running if f["stalled"])},
+            }
+
+    @staticmethod
+    def _current_rate(entry: Dict, now: float):
+        """Return (rate, stalled) for an entry, counting the time since its last bytes."""
+        if entry["status"] != "running":
+            return entry["rate"], False
+        idle = now - entry["_last_progress"]
+        if idle >= STALL_AFTER:
+            return 0.0, True
+        if idle > RATE_DECAY_AFTER:
+            return entry["rate"] * RATE_DECAY_AFTER / idle, False
+        return entry["rate"], False
+
+    def active(self) -> bool:
+        """Whether any transfer is still running."""
+        with self._cond:
+            return any(entry["status"] == "running" for entry in self._files.values())
+
+    @staticmethod
+    def _eta(done: int, total: Optional[int], rate: float) -> Optional[float]:
+        if not total or rate <= 0:
+            return None
+        return max(total - done, 0) / rate
+
+    def wait(self, since_version: int, timeout: float) -> Optional[Dict]:
+        """Block until something changed after since_version; None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.version > since_version, timeout):
+                return None
+        return self.snapshot()
+
+    def stream(self, min_interval: float = 0.5, keepalive: float = 15.0,
+               refresh: float = REFRESH_INTERVAL) -> Iterator[Optional[Dict]]:
+        """Yield coalesced snapshots, at most one per min_interval.
+
+        While transfers run a snapshot is also sent every ``refresh``
+        seconds without changes, so stalls reach the reader. Otherwise
+        yields None after ``keepalive`` seconds without changes so callers
+        can keep idle connections open.
+        """
+        version = -1
+        while True:
+            running = self.active()
+            snapshot = self.wait(version, refresh if running else keepalive)
+            if snapshot is None:
+                if not running:
+                    yield None
+                    continue
+                snapshot = self.snapshot()
+            version = snapshot["version"]
+            yield snapshot
+            time.sleep(min_interval)
+
+
+class TransferBar(tqdm):
+    """Terminal progress bar that also publishes to a ProgressBus."""
+
+    def __init__(self, *args, bus: Optional[ProgressBus] = None, key: str = "", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bus = bus
+        self.key = key
+        if bus is not None:
+            bus.start(key, self.desc or key, self.total, self.n)
+
+    def update(self, n=1):
+        if self.bus is not None:
+            self.bus.advance(self.key, n)
+        return super().update(n)
@@ -0,0 +1,65 @@
+import asyncio
+import re
+import time
+from typing import Iterable, Optional
+
+# Bytes a bucket may run ahead of its rate, in seconds' worth of transfer
+BURST_SECONDS = 0.5
+
+RATE_UNITS = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30}
+
+
+def parse_rate(text: Optional[str]) -> Optional[float]:
+    """Parse a rate such as "10M", "500KB/s" or "0" into bytes per second (None = unlimited)."""
+    if text is None:
+        return None
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?)(?:i?B)?(?:/s)?\s*", str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate: {text!r}")
+    rate = float(match.group(1)) * RATE_UNITS[match.group(2).upper()]
+    return rate or None
+
+
+class TokenBucket:
+    """Byte-rate limiter that hands out transfer slots in arrival order.
+
+    Implemented as virtual scheduling: each reservation extends a shared
+    timeline by ``n / rate`` seconds, so concurrent transfers reading
+    similar-sized chunks interleave and get an even share of the rate.
+    A transfer may run up to BURST_SECONDS ahead of the rate before it has
+    to wait. The rate can be changed at any time, including from another
+    thread; reservations made after the change use the new rate.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        self.rate = rate or None
+        self._next = 0.0
+
+    def set_rate(self, rate: Optional[float]):
+        """Change the limit (None or 0 removes it)."""
+        self.rate = rate or None
+        # Do not make later transfers pay off a backlog built up at the old rate
+        self._next = min(self._next, time.monotonic())
+
+    def reserve(self, nbytes: int) -> float:
+        """Claim nbytes of the rate and return how long to wait before using them."""
+        rate = self.rate
+        if not rate:
+            return 0.0
+        now = time.monotonic()
+        self._next = max(self._next, now) + nbytes / rate
+        return max(self._next - now - BURST_SECONDS, 0.0)
+
+    async def consume(self, nbytes: int):
+        await throttle([self], nbytes)
+
+
+async def throttle(buckets: Iterable[TokenBucket], nbytes: int):
+    """Wait until every bucket allows nbytes more (the slowest one decides)."""
+    delay = max((bucket.reserve(nbytes) for bucket in buckets), default=0.0)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+# Shared by every download in the process; the web UI adjusts it at runtime
+GLOBAL_LIMIT = TokenBucket()
@@ -0,0 +1,139 @@
+import asyncio
+import errno
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import aiohttp
+from scripts.hashing import ChecksumError
+
+# HTTP statuses worth retrying: timeouts, throttling and server-side failures
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Local errors that another attempt cannot fix
+FATAL_ERRNOS = {getattr(errno, name) for name in ("ENOSPC", "EDQUOT", "EACCES", "EPERM", "EROFS")
+                if hasattr(errno, name)}
+# Longest Retry-After we are willing to honour (seconds)
+MAX_RETRY_AFTER = 300.0
+
+
+class CircuitOpenError(IOError):
+    """Raised instead of contacting a host whose circuit breaker is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a failed transfer is worth another (resumed) attempt."""
+    if isinstance(exc, (ChecksumError, CircuitOpenError)):
+        return False
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRYABLE_STATUSES
+    if isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exc, OSError):
+        # Short reads and dropped connections yes, a full disk no
+        return exc.errno not in FATAL_ERRNOS
+    return False
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait via Retry-After, if it did."""
+    headers = getattr(exc, 'headers', None)
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter that honours Retry-After.
+
+    Attempt n (counting from 1) waits a random time up to
+    ``base_delay * 2**(n-1)``, capped at ``max_delay``; a server's
+    Retry-After is used instead when it asks for longer.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, attempt: int, exc: BaseException) -> bool:
+        return attempt < self.max_attempts and is_retryable(exc)
+
+    def delay(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        """Seconds to wait after failed attempt number ``attempt``."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        requested = retry_after(exc) if exc is not None else None
+        if requested is not None:
+            return max(backoff, min(requested, MAX_RETRY_AFTER))
+        return backoff
+
+
+class CircuitBreaker:
+    """Per-host breaker that pauses transfers to a host that keeps failing.
+
+    After ``threshold`` consecutive retryable failures the host's circuit
+    opens for ``cooldown`` seconds; then one trial transfer is let through
+    and its outcome closes or re-opens the circuit. Transfers wait out the
+    cooldown rather than failing; only once the circuit has opened
+    ``max_trips`` times without a success in between is the host given up.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0, max_trips: int = 5):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.max_trips = max(1, max_trips)
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._trips: Dict[str, int] = {}
+        self._half_open = set()
+
+    def is_open(self, host: str) -> bool:
+        """Whether host is still cooling down (does not claim the trial slot)."""
+        return time.monotonic() < self._open_until.get(host, 0.0)
+
+    def remaining(self, host: str) -> float:
+        """Seconds until host's cooldown ends (0 if it is not cooling down)."""
+        return max(self._open_until.get(host, 0.0) - time.monotonic(), 0.0)
+
+    def tripped(self, host: str) -> bool:
+        """Whether host's circuit has opened and not closed again since."""
+        return host in self._open_until
+
+    def exhausted(self, host: str) -> bool:
+        """Whether host kept failing through max_trips cooldowns and should be given up."""
+        return self._trips.get(host, 0) >= self.max_trips
+
+    def allow(self, host: str) -> bool:
+        """Whether a transfer to host may start now."""
+        until = self._open_until.get(host)
+        if until is None:
+            return True
+        if time.monotonic() < until:
+            return False
+        # Half-open: allow one trial and keep others out until it reports back
+        self._open_until[host] = time.monotonic() + self.cooldown
+        self._half_open.add(host)
+        return True
+
+    def record_success(self, host: str):
+        self._failures.pop(host, None)
+        self._open_until.pop(host, None)
+        self._trips.pop(host, None)
+        self._half_open.discard(host)
+
+    def record_failure(self, host: str):
+        self._failures[host] = self._failures.get(host, 0) + 1
+        if self._failures[host] >= self.threshold:
+            # Failures of transfers already in flight extend an open circuit
+            # but only opening it (or a failed trial) counts as a trip
+            if self._failures[host] == self.threshold or host in self._half_open:
+                self._trips[host] = self._trips.get(host, 0) + 1
+            self._half_open.discard(host)
+            self._open_until[host] = time.monotonic() + self.cooldown
@@ -1,26 +1,34 @@
-import os
-import requests
+import asyncio
 import logging
+import sys
 from pathlib import Path
 from typing import Optional, Dict, List
 from datetime import datetime
 
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.download_engine import DownloadEngine
+from scripts.log_config import configure_logging
+
 class DownloadManager:
-    def __init__(self, base_dir: str, max_retries: int = 3):
+    """Synchronous front end for DownloadEngine"""
+
+    def __init__(self, base_dir: str, max_retries: int = 3, chunk_size: int = 2**20,
+                 max_concurrent: int = 4, max_per_host: Optional[int] = None):
         self.base_dir = Path(base_dir)
         self.max_retries = max_retries
+        self.chunk_size = chunk_size
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
         self.setup_logging()
         
     def setup_logging(self):
         """Configure logging system"""
         log_dir = self.base_dir / 'logs'
-        log_dir.mkdir(exist_ok=True)
+        log_dir.mkdir(parents=True, exist_ok=True)
         
-        logging.basicConfig(
-            filename=log_dir / f'download_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt',
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
+        configure_logging(log_dir / f'download_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt')
         
     def create_directory(self, dir_type: str) -> Path:
         """Create and return directory path"""
@@ -29,61 +37,54 @@ class DownloadManager:
         logging.info(f"Created/verified directory: {dir_path}")
         return dir_path
         
-    def download_file(self, url: str, target_dir: str, filename: Optional[str] = None) -> Optional[Path]:
-        """Download file with retry logic"""
-        dir_path = self.create_directory(target_dir)
-        
-        if not filename:
-            filename = url.split('/')[-1]
-            
-        file_path = dir_path / filename
-        
-        if file_path.exists():
-            logging.info(f"File already exists: {file_path}")
-            return file_path
-            
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(url, stream=True)
-                response.raise_for_status()
-                
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            
-                logging.info(f"Successfully downloaded: {url} to {file_path}")
-                return file_path
-                
-            except Exception as e:
-                logging.error(f"Download attempt {attempt + 1} failed for {url}: {str(e)}")
-                if attempt == self.max_retries - 1:
-                    logging.error(f"Max retries reached for {url}")
-                    return None
-                    
-        return None
-        
+    def download_file(self, url: str, target_dir: str, filename: Optional[str] = None,
+                      sha256: Optional[str] = None) -> Optional[Path]:
+        """Download file with retry logic, verifying sha256 if given"""
+        results = self.process_download_list([{'url': url, 'directory': target_dir,
+                                               'filename': filename, 'sha256': sha256}])
+        return Path(results['success'][0]) if results['success'] else None
+
     def process_download_list(self, download_list: List[Dict[str, str]]) -> Dict[str, List[str]]:
-        """Process a list of downloads with their target directories"""
+        """Process a list of downloads with their target directories
+
+        Runs the whole batch concurrently on the async DownloadEngine, so
+        retries, resume and per-host limits match manage.py. Must be called
+        from synchronous code (it starts its own event loop).
+        """
         results = {
             'success': [],
             'failed': []
         }
-        
+
+        targets, items = [], []
         for item in download_list:
             url = item['url']
-            target_dir = item['directory']
-            filename = item.get('filename')
-            
-            result = self.download_file(url, target_dir, filename)
-            
-            if result:
-                results['success'].append(str(result))
-            else:
+            file_path = self.create_directory(item['directory']) / (item.get('filename') or url.split('/')[-1])
+            targets.append((url, file_path))
+            if file_path.exists():
+                logging.info(f"File already exists: {file_path}")
+                continue
+            items.append({'url': url, 'target_path': file_path, 'sha256': item.get('sha256')})
+
+        outcomes = {}
+        if items:
+            for item, (_, outcome) in zip(items, asyncio.run(self.run_batch(items))):
+                outcomes[item['target_path']] = outcome
+
+        for url, file_path in targets:
+            if isinstance(outcomes.get(file_path), BaseException):
+                logging.error(f"Download failed for {url}: {str(outcomes[file_path])}")
                 results['failed'].append(url)
-                
+            else:
+                results['success'].append(str(file_path))
+
         return results
 
+    async def run_batch(self, items: List[Dict]):
+        async with DownloadEngine(self.max_concurrent, self.max_per_host, chunk_size=self.chunk_size,
+                                  max_retries=self.max_retries) as engine:
+            return await engine.download_all(items)
+
 # Usage Example:
 if __name__ == "__main__":
     download_list = [
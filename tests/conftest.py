@@ -0,0 +1,49 @@
+import hashlib
+import re
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class FileServer:
+    """Local stand-in for a model host serving in-memory files."""
+
+    def __init__(self, files, ranges=True):
+        self.files = files
+        self.ranges = ranges
+        self.requests = []
+        self.server = None
+
+    def url(self, name):
+        return str(self.server.make_url(f"/{name}"))
+
+    async def handle(self, request):
+        name = request.match_info['name']
+        self.requests.append((request.method, name, request.headers.get('Range')))
+        if name not in self.files:
+            raise web.HTTPNotFound()
+
+        data = self.files[name]
+        headers = {'ETag': f'"{hashlib.md5(data).hexdigest()}"'}
+        status = 200
+        match = re.match(r'bytes=(\d+)-(\d*)$', request.headers.get('Range', ''))
+        if self.ranges:
+            headers['Accept-Ranges'] = 'bytes'
+            if match:
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else len(data) - 1
+                headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+                data = data[start:end + 1]
+                status = 206
+        return web.Response(body=data, status=status, headers=headers)
+
+
+@pytest_asyncio.fixture
+async def file_server():
+    """Start a FileServer; tests fill ``files`` and toggle ``ranges``."""
+    app = web.Application()
+    server = FileServer({})
+    app.router.add_route('*', '/{name}', server.handle)
+    async with TestServer(app) as test_server:
+        server.server = test_server
+        yield server
@@ -0,0 +1,121 @@
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import app as app_module
+
+def wait_for_job(client, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").get_json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_post_job_returns_immediately(monkeypatch):
+    """Test downloads run as background jobs with captured output"""
+    calls = []
+
+    async def fake_main(argv=None, progress=None, rate_limit=None):
+        calls.append(argv)
+        print("Model downloads complete.")
+
+    monkeypatch.setattr(app_module, "manage_main", fake_main)
+    client = app_module.app.test_client()
+
+    response = client.post("/jobs", json={"models": ["https://example.com/a.safetensors"], "test_mode": True})
+    assert response.status_code == 202
+    job = wait_for_job(client, response.get_json()["id"])
+
+    assert job["status"] == "succeeded"
+    assert "Model downloads complete." in job["output"]
+    assert calls == [["--download", "--models", "https://example.com/a.safetensors", "--test"]]
+
+def test_unknown_job_is_404():
+    """Test status lookups for missing jobs"""
+    client = app_module.app.test_client()
+    assert client.get("/jobs/missing").status_code == 404
+
+def test_progress_snapshot():
+    """Test the progress endpoint reports transfers on the shared bus"""
+    app_module.progress_bus.start("/tmp/x.safetensors", "x.safetensors", 100)
+    client = app_module.app.test_client()
+    files = client.get("/progress").get_json()["files"]
+    assert any(f["name"] == "x.safetensors" for f in files)
+
+def test_rate_limit_is_adjustable(monkeypatch):
+    """Test the global and per-job bandwidth caps can be changed at runtime"""
+    limits = []
+
+    async def fake_main(argv=None, progress=None, rate_limit=None):
+        limits.append(rate_limit)
+
+    monkeypatch.setattr(app_module, "manage_main", fake_main)
+    client = app_module.app.test_client()
+    job_id = app_module.submit_download([], limit_rate=2**20)
+    wait_for_job(client, job_id)
+    try:
+        assert client.post("/rate-limit", json={"rate": "10M"}).get_json()["global"] == 10 * 2**20
+        caps = client.post("/rate-limit", json={"rate": "512K", "job": job_id}).get_json()
+        assert caps["jobs"][job_id] == 512 * 2**10
+        assert limits[0].rate == 512 * 2**10
+        assert client.post("/rate-limit", json={"rate": "fast"}).status_code == 400
+        assert client.post("/rate-limit", json={"rate": "1M", "job": "missing"}).status_code == 404
+    finally:
+        app_module.GLOBAL_LIMIT.set_rate(None)
+
+def test_metrics_endpoint():
+    """Test download metrics are exported for Prometheus"""
+    client = app_module.app.test_client()
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert "# TYPE model_rocket_download_bytes_total counter" in response.get_data(as_text=True)
+
+def test_finished_jobs_are_evicted(monkeypatch):
+    """Test only the newest finished jobs, and their rate limits, are kept"""
+    async def fake_main(argv=None, progress=None, rate_limit=None):
+        pass
+
+    monkeypatch.setattr(app_module, "manage_main", fake_main)
+    monkeypatch.setattr(app_module.job_runner, "max_finished", 1)
+    client = app_module.app.test_client()
+    first = app_module.submit_download([])
+    wait_for_job(client, first)
+    second = app_module.submit_download([])
+    wait_for_job(client, second)
+
+    assert client.get(f"/jobs/{first}").status_code == 404
+    assert first not in app_module.job_limits
+    assert first not in app_module.job_runner.outputs
+    assert client.get(f"/jobs/{second}").get_json()["status"] == "succeeded"
+    assert second in app_module.job_limits
+
+def test_failed_run_fails_the_job(monkeypatch):
+    """Test a run that refuses or loses downloads is reported as a failed job"""
+    async def fake_main(argv=None, progress=None, rate_limit=None):
+        print("1 model download(s) failed:")
+        return 1
+
+    monkeypatch.setattr(app_module, "manage_main", fake_main)
+    client = app_module.app.test_client()
+    job = wait_for_job(client, app_module.submit_download([]))
+    assert job["status"] == "failed"
+    assert "Download run failed" in job["error"]
+
+def test_space_check_can_be_skipped(monkeypatch):
+    """Test web jobs can override the plan's disk space check"""
+    calls = []
+
+    async def fake_main(argv=None, progress=None, rate_limit=None):
+        calls.append(argv)
+
+    monkeypatch.setattr(app_module, "manage_main", fake_main)
+    client = app_module.app.test_client()
+    response = client.post("/jobs", json={"models": [], "skip_space_check": True})
+    wait_for_job(client, response.get_json()["id"])
+    assert calls == [["--download", "--skip-space-check"]]
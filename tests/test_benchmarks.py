@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_downloads import find_regressions, run_benchmarks
+
+@pytest.mark.asyncio
+async def test_benchmarks_run_against_standin(tmp_path):
+    """Test a small benchmark run covers both front ends, verification and injected failures"""
+    configs = ["manager-segmented-verify", "flaky-stream", "download-manager"]
+    results = await run_benchmarks(configs, 8 * 2**20, workroot=str(tmp_path))
+
+    assert [run['config'] for run in results] == configs
+    for run in results:
+        assert 'error' not in run, run
+        assert run['mb_s'] > 0 and run['cpu_seconds'] > 0 and run['peak_rss'] > 0
+
+    baseline = [dict(run, mb_s=run['mb_s'] * 2) for run in results]
+    assert len(find_regressions(results, baseline, tolerance=0.2)) == len(configs)
+    assert find_regressions(results, results, tolerance=0.2) == []
@@ -0,0 +1,34 @@
+import pytest
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.block_writer import BlockWriter
+
+@pytest.mark.asyncio
+async def test_writes_run_in_order():
+    """Test queued items run in order and their callbacks fire on the loop"""
+    written, confirmed = [], []
+    async with BlockWriter(depth=2) as writer:
+        for i in range(10):
+            await writer.submit(written.append, i, done=lambda i=i: confirmed.append(i))
+    assert written == list(range(10))
+    assert confirmed == list(range(10))
+
+@pytest.mark.asyncio
+async def test_write_error_is_raised():
+    """Test a failed write skips later items and surfaces on close"""
+    written = []
+
+    def fail():
+        raise OSError("disk full")
+
+    writer = BlockWriter()
+    writer.start()
+    await writer.submit(fail)
+    await writer.submit(written.append, 1)
+    with pytest.raises(OSError):
+        await writer.close()
+    assert written == []
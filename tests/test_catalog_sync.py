@@ -0,0 +1,70 @@
+import json
+import sys
+from pathlib import Path
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.catalog_sync import CatalogSync, CivitaiSync, HuggingFaceSync
+
+SHA = "ab" * 32
+
+def civitai_item(n):
+    return {"name": f"LoRA {n}", "modelVersions": [{"name": "v1", "files": [
+        {"primary": True, "name": f"lora_{n}.safetensors", "sizeKB": 1024, "hashes": {"SHA256": SHA.upper()},
+         "downloadUrl": f"https://civitai.com/api/download/models/{n}"}]}]}
+
+class StandIn:
+    """Local stand-in for the Civitai and Hugging Face APIs."""
+
+    def __init__(self):
+        self.server = None
+
+    async def civitai(self, request):
+        cursor = int(request.query.get("cursor", 0))
+        next_page = str(self.server.make_url(f"/api/v1/models?types=LORA&cursor={cursor + 1}")) if cursor < 2 else None
+        return web.json_response({"items": [civitai_item(cursor * 10 + i) for i in range(3)],
+                                  "metadata": {"nextPage": next_page}})
+
+    async def tree(self, request):
+        files = [{"type": "file", "path": "README.md", "size": 10},
+                 {"type": "file", "path": f"mm_{request.query.get('page', '0')}.ckpt", "size": 5,
+                  "lfs": {"oid": SHA, "size": 2 * 2**30}}]
+        headers = {}
+        if "page" not in request.query:
+            headers["Link"] = f'<{self.server.make_url(request.path)}?recursive=true&page=1>; rel="next"'
+        return web.json_response(files, headers=headers)
+
+@pytest.mark.asyncio
+async def test_sync_pages_and_merges(tmp_path):
+    """Test both adapters page through results into the nested database"""
+    database = tmp_path / "model_database.json"
+    existing = {"name": "LoRA 0", "url": "https://civitai.com/api/download/models/0", "type": "lora"}
+    database.write_text(json.dumps({"SD 1.5": {"LoRA Models": [existing]}}))
+
+    stand_in = StandIn()
+    app = web.Application()
+    app.router.add_get('/api/v1/models', stand_in.civitai)
+    app.router.add_get('/api/models/{owner}/{repo}/tree/main', stand_in.tree)
+    async with TestServer(app) as server:
+        stand_in.server = server
+        base = str(server.make_url("/"))
+        async with aiohttp.ClientSession() as session:
+            adapters = [CivitaiSync(session, base, types=["LORA"]),
+                        HuggingFaceSync(session, base, repos={"guoyww/animatediff": "motion_module"})]
+            totals = await CatalogSync(adapters, str(database)).run()
+
+    data = json.loads(database.read_text())
+    assert totals == {"added": 10, "updated": 1, "failed": 0}
+    # Known URLs are filled in where they already live, not duplicated
+    assert data["SD 1.5"]["LoRA Models"] == [dict(existing, size="1.00MB", sha256=SHA,
+                                                  filename="lora_0.safetensors")]
+    assert len(data["Civitai"]["LoRA Models"]) == 8
+    hf = data["Hugging Face"]["guoyww/animatediff"]
+    assert [m["url"].rsplit("/", 1)[-1] for m in hf] == ["mm_0.ckpt", "mm_1.ckpt"]
+    assert hf[0]["size"] == "2.00GB" and hf[0]["sha256"] == SHA
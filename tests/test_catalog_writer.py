@@ -0,0 +1,48 @@
+import json
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.catalog_writer import catalog_writer, iter_jsonl
+from scripts.model_catalog import ModelCatalog
+from scripts.model_scanner import ModelScanner
+
+SD15 = {"name": "SD 1.5", "url": "https://example.com/sd15.safetensors", "type": "checkpoint", "required": True}
+MM = {"name": "MM", "url": "https://example.com/mm.ckpt", "type": "motion_module", "required": False}
+
+def test_scan_merges_into_nested_database(tmp_path, monkeypatch):
+    """Test a scan adds new URLs without dropping the existing layout"""
+    monkeypatch.chdir(tmp_path)
+    database = tmp_path / "model_database.json"
+    database.write_text(json.dumps({"SD 1.5": {"Base Models": [SD15]}}))
+
+    scanner = ModelScanner()
+    scanner.model_info["base_models"] = [dict(SD15, size="4.27GB")]
+    scanner.model_info["animatediff"] = [MM]
+    scanner.save_model_database(str(database))
+
+    data = json.loads(database.read_text())
+    assert data["SD 1.5"]["Base Models"] == [dict(SD15, size="4.27GB")]
+    assert data["Scanned"] == {"AnimateDiff Models": [MM]}
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_jsonl_appends_and_streams(tmp_path):
+    """Test JSON Lines catalogs append changes and survive a torn last line"""
+    path = str(tmp_path / "model_database.jsonl")
+    writer = catalog_writer(path)
+    writer.merge("SD 1.5", "Base Models", [SD15])
+    writer.flush()
+    with open(path, 'a') as f:
+        f.write('{"category": "SD 1.5", "subcat')
+
+    writer = catalog_writer(path)
+    assert writer.merge("SD 1.5", "Base Models", [SD15]) == (0, 0)
+    assert writer.merge("AnimateDiff", "Motion", [MM, dict(SD15, sha256="ab")]) == (1, 1)
+    writer.flush()
+
+    assert [model["url"] for _, _, model in iter_jsonl(path)] == [SD15["url"], MM["url"], SD15["url"]]
+    catalog = ModelCatalog(path)
+    assert catalog.by_url(SD15["url"])["sha256"] == "ab"
+    assert [name for name in catalog.flattened()] == ["SD 1.5 - Base Models", "AnimateDiff - Motion"]
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import chunk_buffer
+from scripts.chunk_buffer import ChunkBuffer
+
+def test_feed_coalesces_reads():
+    """Test small reads come out as full fixed-size blocks plus a tail"""
+    buffer = ChunkBuffer(10, adaptive=False)
+    blocks = []
+    for data in (b"abcd", b"efghijklmn", b"opq"):
+        blocks.extend(bytes(block) for block in buffer.feed(data))
+    assert blocks == [b"abcdefghij"]
+    assert bytes(buffer.take()) == b"klmnopq"
+    assert bytes(buffer.take()) == b""
+
+def test_adaptive_growth(monkeypatch):
+    """Test a buffer that fills quickly doubles up to the maximum"""
+    monkeypatch.setattr(chunk_buffer, "MAX_CHUNK_SIZE", 64)
+    buffer = ChunkBuffer(16)
+    for _ in buffer.feed(bytes(16 + 32 + 64)):
+        pass
+    assert buffer.size == 64
@@ -0,0 +1,61 @@
+import os
+import pytest
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.download_planner import DownloadPlanner, parse_size
+from scripts.model_manager import ModelManager
+
+def test_parse_size():
+    """Test database size strings are converted to bytes"""
+    assert parse_size("402MB") == 402 * 2**20
+    assert parse_size("6.46GB") == int(6.46 * 2**30)
+    assert parse_size("unknown") is None
+
+@pytest.mark.asyncio
+async def test_plan_counts_only_missing_bytes(file_server, tmp_path, monkeypatch):
+    """Test the plan uses real sizes and skips installed files"""
+    monkeypatch.chdir(tmp_path)
+    file_server.files["new.safetensors"] = os.urandom(5_000)
+    file_server.files["old.safetensors"] = os.urandom(7_000)
+    urls = [file_server.url("new.safetensors"), file_server.url("old.safetensors")]
+
+    async with ModelManager(base_path=str(tmp_path)) as manager:
+        installed = manager.get_target_directory("unknown", urls[1]) / "old.safetensors"
+        installed.parent.mkdir(parents=True)
+        installed.write_bytes(b"x")
+        plan = await DownloadPlanner(manager).plan(model_urls=urls)
+
+    statuses = [(e["status"], e["needed"]) for e in plan["entries"]]
+    assert statuses == [("download", 5_000), ("present", 0)]
+    assert plan["filesystems"][0]["needed"] == 5_000
+    assert plan["filesystems"][0]["ok"]
+
+@pytest.mark.asyncio
+async def test_plan_probe_is_reused_by_download(file_server, tmp_path, monkeypatch):
+    """Test a planned download sends one HEAD per file"""
+    monkeypatch.chdir(tmp_path)
+    file_server.files["model.safetensors"] = os.urandom(5_000)
+    urls = [file_server.url("model.safetensors")]
+
+    async with ModelManager(base_path=str(tmp_path)) as manager:
+        await DownloadPlanner(manager).plan(model_urls=urls)
+        await manager.download_models(model_urls=urls)
+
+    heads = [r for r in file_server.requests if r[0] == "HEAD"]
+    assert len(heads) == 1
+    assert manager.probes == {}
+
+@pytest.mark.asyncio
+async def test_plan_unknown_size_is_not_ok(file_server, tmp_path, monkeypatch):
+    """Test a file of unknown size fails the space check"""
+    monkeypatch.chdir(tmp_path)
+    async with ModelManager(base_path=str(tmp_path)) as manager:
+        plan = await DownloadPlanner(manager).plan(model_urls=[file_server.url("missing.safetensors")])
+
+    assert plan["entries"][0]["status"] == "unknown size"
+    assert plan["filesystems"][0]["unknown"] == 1
+    assert not plan["filesystems"][0]["ok"]
@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.download_scheduler import DownloadScheduler, host_of
+
+def test_host_of():
+    """Test host normalization"""
+    assert host_of("https://www.civitai.com/api/download/models/1") == "civitai.com"
+    assert host_of("https://huggingface.co/a/b/resolve/main/c.safetensors") == "huggingface.co"
+
+def test_per_host_cap_overrides_host_defaults():
+    """Test --per-host applies to hosts with a built-in limit"""
+    assert DownloadScheduler(8).host_limit("huggingface.co") == 4
+    assert DownloadScheduler(8).host_limit("example.com") == 2
+    assert DownloadScheduler(8, 1).host_limit("huggingface.co") == 1
+    assert DownloadScheduler(8, 1).host_limit("civitai.com") == 1
+    assert DownloadScheduler(8, 1, host_limits={"huggingface.co": 3}).host_limit("huggingface.co") == 3
+
+@pytest.mark.asyncio
+async def test_scheduler_limits_and_priority():
+    """Test global/per-host caps and required-first ordering"""
+    scheduler = DownloadScheduler(max_concurrent=3, max_per_host=1, host_limits={"a.test": 2})
+    started = []
+    active = {"total": 0, "peak": 0, "a.test": 0, "a_peak": 0}
+
+    def job(name, host):
+        async def run():
+            started.append(name)
+            active["total"] += 1
+            active[host] = active.get(host, 0) + 1
+            active["peak"] = max(active["peak"], active["total"])
+            if host == "a.test":
+                active["a_peak"] = max(active["a_peak"], active[host])
+            await asyncio.sleep(0.01)
+            active["total"] -= 1
+            active[host] -= 1
+            return name
+        return run
+
+    for i in range(4):
+        scheduler.add(f"https://a.test/{i}", job(f"a{i}", "a.test"), priority=1)
+    scheduler.add("https://b.test/0", job("required", "b.test"), priority=0)
+
+    results = await scheduler.run()
+    assert started[0] == "required"
+    assert active["peak"] <= 3
+    assert active["a_peak"] == 2
+    assert [r for _, r in results] == ["a0", "a1", "a2", "a3", "required"]
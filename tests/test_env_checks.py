@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import env_checks
+from scripts.env_checks import check_filesystems, group_by_filesystem
+from scripts.model_library import target_directories
+
+def test_target_directories_share_one_filesystem(tmp_path):
+    """Test directories on one volume, existing or not, are probed once"""
+    directories = target_directories(tmp_path / "ComfyUI")
+    groups = group_by_filesystem(directories)
+    assert list(groups.values()) == [directories[0]]
+
+@pytest.mark.asyncio
+async def test_passing_checks_are_cached(tmp_path):
+    """Test a passing check is reused within the TTL and failures are probed again"""
+    env_checks.clear_cache()
+    calls = []
+
+    def check(directory):
+        calls.append(directory)
+        return len(calls) > 1
+
+    directories = target_directories(tmp_path)
+    assert not await check_filesystems("probe", directories, check)
+    assert await check_filesystems("probe", directories, check)
+    assert await check_filesystems("probe", directories, check)
+    assert len(calls) == 2
+
+    assert await check_filesystems("probe", directories, check, ttl=0)
+    assert len(calls) == 3
+    env_checks.clear_cache()
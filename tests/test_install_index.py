@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.install_index import InstallIndex
+from scripts.model_manager import ModelManager
+
+def test_refresh_only_rescans_changed_directories(tmp_path):
+    """Test unchanged directories are not re-listed and digests survive reloads"""
+    (tmp_path / "models/vae").mkdir(parents=True)
+    (tmp_path / "models/loras").mkdir(parents=True)
+    (tmp_path / "models/vae/a.safetensors").write_bytes(b"a" * 10)
+
+    index = InstallIndex(tmp_path, ["models/vae", "models/loras", "models/missing"])
+    assert index.refresh() == 2
+    index.record(tmp_path / "models/vae/a.safetensors", "ABC")
+    index.save()
+
+    index = InstallIndex(tmp_path, ["models/vae", "models/loras", "models/missing"])
+    assert index.refresh() == 0
+    assert index.get(tmp_path / "models/vae/a.safetensors") == {"size": 10, "mtime_ns": os.stat(
+        tmp_path / "models/vae/a.safetensors").st_mtime_ns, "sha256": "abc"}
+
+    (tmp_path / "models/loras/b.safetensors").write_bytes(b"b")
+    assert index.refresh() == 1
+    assert tmp_path / "models/loras/b.safetensors" in index
+    assert index.get(tmp_path / "models/vae/a.safetensors")["sha256"] == "abc"
+
+def test_indexes_sharing_a_tree_keep_each_others_files(tmp_path):
+    """Test a file recorded by one index is not lost when another saves last"""
+    (tmp_path / "models/vae").mkdir(parents=True)
+    first = InstallIndex(tmp_path, ["models/vae"])
+    second = InstallIndex(tmp_path, ["models/vae"])
+    first.refresh()
+    second.refresh()
+
+    (tmp_path / "models/vae/x.safetensors").write_bytes(b"x")
+    first.record(tmp_path / "models/vae/x.safetensors")
+    first.save()
+    (tmp_path / "models/vae/y.safetensors").write_bytes(b"y")
+    second.record(tmp_path / "models/vae/y.safetensors")
+    second.save()
+
+    index = InstallIndex(tmp_path, ["models/vae"])
+    index.refresh()
+    assert tmp_path / "models/vae/x.safetensors" in index
+    assert tmp_path / "models/vae/y.safetensors" in index
+
+def test_concurrent_saves(tmp_path):
+    """Test threads saving indexes of one tree never collide on the temp file"""
+    (tmp_path / "models/vae").mkdir(parents=True)
+    errors = []
+
+    def save_repeatedly():
+        for _ in range(50):
+            index = InstallIndex(tmp_path, ["models/vae"])
+            index.dirty = True
+            try:
+                index.save()
+            except OSError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=save_repeatedly) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+def test_install_status(tmp_path, monkeypatch):
+    """Test models are reported as installed, missing, partial or stale"""
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "ComfyUI"
+    models = [
+        {"name": name, "url": f"https://example.com/{name}.safetensors", "type": "vae", "sha256": sha}
+        for name, sha in [("ok", "aa"), ("gone", None), ("half", None), ("old", "bb")]
+    ]
+    (tmp_path / "model_database.json").write_text(json.dumps({"VAE": models}))
+
+    manager = ModelManager(base_path=str(base))
+    manager.create_directory_structure()
+    vae = base / "models/vae"
+    for name in ("ok", "old"):
+        (vae / f"{name}.safetensors").write_bytes(b"x")
+        manager.index.refresh()
+        manager.index.record(vae / f"{name}.safetensors", "aa")
+    (vae / "half.safetensors.part").write_bytes(b"x")
+
+    report = {item['name']: item['status'] for item in manager.install_status()}
+    assert report == {"ok": "installed", "gone": "missing", "half": "partial", "old": "stale"}
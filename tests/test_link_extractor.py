@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import scripts.link_extractor as link_extractor
+from scripts.link_extractor import LinkExtractor, normalize_url
+from scripts.model_scanner import ModelScanner
+
+DOCUMENT = """
+# Models
+Download [SD 1.5](https://huggingface.co/runwayml/stable-diffusion-v1-5/blob/main/v1-5-pruned.safetensors)
+or <a href="https://huggingface.co/runwayml/stable-diffusion-v1-5/resolve/main/v1-5-pruned.safetensors?download=true">here</a>.
+Motion: https://huggingface.co/guoyww/animatediff/resolve/main/mm_sd_v15_v2.ckpt.
+IP-Adapter: https://huggingface.co/h94/IP-Adapter/resolve/main/models/ip-adapter_sd15.bin
+LoRA: https://civitai.com/api/download/models/4138?type=Model&amp;format=SafeTensor
+Index files are not models: https://huggingface.co/a/b/resolve/main/model.safetensors.index.json
+"""
+
+def test_extract_dedupes_and_classifies(tmp_path, monkeypatch):
+    """Test links are normalized, deduplicated and typed in one pass"""
+    monkeypatch.chdir(tmp_path)
+    links = ModelScanner().extract_links(DOCUMENT)
+    assert [(link["name"], link["type"]) for link in links] == [
+        ("v1-5-pruned", "checkpoint"),
+        ("mm_sd_v15_v2", "motion_module"),
+        ("ip-adapter_sd15", "ipadapter"),
+        ("Civitai model 4138", "unknown"),
+    ]
+    assert links[0]["url"] == "https://huggingface.co/runwayml/stable-diffusion-v1-5/resolve/main/v1-5-pruned.safetensors"
+    assert links[3]["url"] == "https://civitai.com/api/download/models/4138?format=SafeTensor&type=Model"
+
+def test_stream_matches_whole_document(monkeypatch):
+    """Test chunked input finds the same links as the whole document"""
+    monkeypatch.setattr(link_extractor, "MAX_URL_LENGTH", 120)
+    extractor = LinkExtractor()
+    chunks = [DOCUMENT[i:i + 7] for i in range(0, len(DOCUMENT), 7)]
+    assert list(extractor.extract_stream(chunks)) == extractor.extract(DOCUMENT)
+
+def test_discover_keeps_curated_entries(tmp_path, monkeypatch):
+    """Test scanned pages add new models without duplicating known ones"""
+    monkeypatch.chdir(tmp_path)
+    scanner = ModelScanner()
+    known = [{"name": "SD 1.5", "url": "https://huggingface.co/runwayml/stable-diffusion-v1-5/resolve/main/v1-5-pruned.safetensors",
+              "type": "checkpoint", "size": "4.27GB", "required": True}]
+    models = scanner.discover(DOCUMENT, known, {"checkpoint", "motion_module"})
+    assert models[0] is known[0]
+    assert [m["name"] for m in models[1:]] == ["mm_sd_v15_v2"]
+
+def test_normalize_url():
+    """Test cosmetic URL differences share one key"""
+    assert normalize_url("HTTPS://www.HuggingFace.co/a/b/blob/main/x.safetensors#frag") == \
+        "https://huggingface.co/a/b/resolve/main/x.safetensors"
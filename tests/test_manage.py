@@ -1,6 +1,7 @@
 import pytest
 import os
 import platform
+import subprocess
 import sys
 from pathlib import Path
 
@@ -26,3 +27,35 @@ async def test_environment_check():
     result = await check_environment()
     assert result == True
     assert os.path.exists(get_default_path())
+
+# Modules that only scan, sync, plan and download runs should load
+HEAVY_MODULES = {"aiohttp", "tqdm", "bs4", "requests", "flask"}
+# Cumulative import time allowed for manage.py (microseconds, as -X importtime reports)
+MANAGE_IMPORT_BUDGET = 200_000
+
+def import_times(args, cwd):
+    """Run Python with -X importtime and return {module: cumulative microseconds}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=cwd,
+                            capture_output=True, text=True, timeout=60)
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+def test_manage_import_stays_within_budget(tmp_path):
+    """Test importing manage.py skips the network stack and stays within its startup budget"""
+    root = str(Path(__file__).parent.parent)
+    times = import_times(["-c", f"import sys; sys.path.insert(0, {root!r}); import manage"], tmp_path)
+    assert not HEAVY_MODULES & times.keys()
+    assert times["manage"] < MANAGE_IMPORT_BUDGET
+
+def test_status_run_skips_network_stack(tmp_path):
+    """Test --status and --setup runs never import aiohttp or tqdm"""
+    manage_py = str(Path(__file__).parent.parent / "manage.py")
+    times = import_times([manage_py, "--setup", "--status", "--force", "--path", str(tmp_path / "ComfyUI")], tmp_path)
+    assert "scripts.model_library" in times
+    assert not HEAVY_MODULES & times.keys()
+    assert (tmp_path / "ComfyUI" / "models" / "checkpoints").is_dir()
@@ -0,0 +1,75 @@
+import logging
+import sys
+from pathlib import Path
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import metrics
+from scripts.log_config import configure_logging
+from scripts.metrics import MetricsRegistry
+from scripts.model_manager import ModelManager
+from scripts.profiling import PROFILE_ENV, profiled
+
+def test_prometheus_rendering():
+    """Test counters and histograms render in the Prometheus text format"""
+    registry = MetricsRegistry()
+    downloads = registry.counter("downloads_total", "Files downloaded")
+    latency = registry.histogram("ttfb_seconds", "Time to first byte", buckets=(0.1, 1.0))
+    downloads.inc(result="done")
+    downloads.inc(2, result="failed")
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert '# TYPE downloads_total counter' in text
+    assert 'downloads_total{result="failed"} 2' in text
+    assert 'ttfb_seconds_bucket{le="0.1"} 1' in text
+    assert 'ttfb_seconds_bucket{le="+Inf"} 2' in text
+    assert 'ttfb_seconds_count 2' in text
+    assert registry.snapshot()["ttfb_seconds"]["values"][0]["buckets"]["1"] == 2
+    assert registry.counter("downloads_total", "Files downloaded") is downloads
+
+def test_profiled_runs_one_profiler_per_file(tmp_path, monkeypatch):
+    """Test env-configured profiles get their own files and never nest"""
+    monkeypatch.setenv(PROFILE_ENV, str(tmp_path / "run.prof"))
+    with profiled() as outer:
+        with profiled() as inner:
+            assert inner is None
+        assert outer is not None
+    with profiled() as later:
+        assert later is not None
+    assert len(list(tmp_path.glob("run.*.prof"))) == 2
+
+def test_configure_logging_is_idempotent(tmp_path):
+    """Test each log destination is attached once, however often it is configured"""
+    root = logging.getLogger()
+    before = list(root.handlers)
+    try:
+        for _ in range(3):
+            configure_logging(str(tmp_path / "a.log"))
+            configure_logging(str(tmp_path / "b.log"))
+        added = [h for h in root.handlers if h not in before]
+        assert sorted(h._log_destination for h in added) == [str(tmp_path / "a.log"), str(tmp_path / "b.log")]
+    finally:
+        for handler in root.handlers[:]:
+            if handler not in before:
+                root.removeHandler(handler)
+                handler.close()
+
+@pytest.mark.asyncio
+async def test_download_records_metrics(file_server, tmp_path, monkeypatch):
+    """Test a download updates the byte, result and latency metrics"""
+    monkeypatch.chdir(tmp_path)
+    file_server.files["model.safetensors"] = b"x" * 50000
+    received = metrics.BYTES_RECEIVED.value()
+    done = metrics.DOWNLOADS.value(result="done")
+
+    async with ModelManager(base_path=str(tmp_path), segments=1) as manager:
+        await manager.download("model", file_server.url("model.safetensors"), tmp_path / "model.safetensors")
+
+    assert metrics.BYTES_RECEIVED.value() - received == 50000
+    assert metrics.DOWNLOADS.value(result="done") - done == 1
+    assert 'model_rocket_time_to_first_byte_seconds_count' in metrics.REGISTRY.render()
+    assert manager.received_bytes == {}
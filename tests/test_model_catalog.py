@@ -0,0 +1,42 @@
+import json
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.model_catalog import ModelCatalog, model_filename
+
+SDXL = {"name": "SDXL", "url": "https://hf.test/sd_xl_base_1.0.safetensors", "type": "checkpoint"}
+LORA = {"name": "Detail", "url": "https://civitai.test/detail.safetensors", "type": "lora"}
+
+def test_indexes_nested_database(tmp_path):
+    """Test nested categories are flattened and indexed"""
+    db = tmp_path / "model_database.json"
+    db.write_text(json.dumps({"SDXL": {"Base Models": [SDXL], "LoRAs": [LORA]}}))
+    catalog = ModelCatalog(db)
+
+    assert list(catalog.flattened()) == ["SDXL - Base Models", "SDXL - LoRAs"]
+    assert catalog.by_url(LORA["url"])["name"] == "Detail"
+    assert catalog.by_type("checkpoint") == [SDXL]
+    assert catalog.by_category("SDXL") == [SDXL, LORA]
+    assert catalog.by_filename("detail.safetensors") == [LORA]
+
+def test_reloads_when_file_changes(tmp_path):
+    """Test the catalog only reparses after the file changes"""
+    db = tmp_path / "model_database.json"
+    db.write_text(json.dumps({"Base Models": [SDXL]}))
+    catalog = ModelCatalog(db)
+    first = catalog.flattened()
+    assert catalog.flattened() is first
+
+    db.write_text(json.dumps({"Base Models": [SDXL, LORA]}))
+    assert len(catalog.flattened()["Base Models"]) == 2
+
+def test_model_filename():
+    """Test installs use the API's file name and never a query string"""
+    url = "https://civitai.com/api/download/models/62833?type=Model&format=SafeTensor"
+    assert model_filename({"url": url, "filename": "detail.safetensors"}) == "detail.safetensors"
+    assert model_filename({"url": url}) == "62833"
+    assert model_filename({"url": "https://hf.test/a/b.safetensors?download=true"}) == "b.safetensors"
+    assert model_filename({"url": url, "filename": "../../evil.safetensors"}) == "evil.safetensors"
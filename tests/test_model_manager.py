@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import os
+import pytest
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import scripts.download_engine as download_engine
+from scripts.blob_store import BlobStore
+from scripts.hashing import ChecksumError
+from scripts.download_engine import split_ranges
+from scripts.model_manager import ModelManager
+from scripts.partial_download import PartialDownload
+
+def test_split_ranges():
+    """Test byte ranges cover the file exactly once"""
+    assert split_ranges(10, 3) == [(0, 4), (4, 8), (8, 10)]
+    assert split_ranges(2, 4) == [(0, 1), (1, 2)]
+
+@pytest.mark.asyncio
+async def test_segmented_download(file_server, tmp_path, monkeypatch):
+    """Test large files are fetched as parallel ranges"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(download_engine, "SEGMENT_THRESHOLD", 1024)
+    data = os.urandom(100_000)
+    file_server.files["model.safetensors"] = data
+
+    async with ModelManager(base_path=str(tmp_path), segments=4) as manager:
+        target = tmp_path / "model.safetensors"
+        await manager.download_file(file_server.url("model.safetensors"), target,
+                                    hashlib.sha256(data).hexdigest())
+
+    assert target.read_bytes() == data
+    assert sum(1 for _, _, r in file_server.requests if r) == 4
+
+@pytest.mark.asyncio
+async def test_download_without_range_support(file_server, tmp_path, monkeypatch):
+    """Test servers without Accept-Ranges fall back to a single stream"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(download_engine, "SEGMENT_THRESHOLD", 1024)
+    data = os.urandom(50_000)
+    file_server.files["model.safetensors"] = data
+    file_server.ranges = False
+
+    async with ModelManager(base_path=str(tmp_path), segments=4) as manager:
+        target = tmp_path / "model.safetensors"
+        await manager.download_file(file_server.url("model.safetensors"), target)
+
+    assert target.read_bytes() == data
+    assert [m for m, _, _ in file_server.requests] == ["HEAD", "GET"]
+
+@pytest.mark.asyncio
+async def test_resume_partial_download(file_server, tmp_path, monkeypatch):
+    """Test an interrupted transfer continues from its .part file"""
+    monkeypatch.chdir(tmp_path)
+    data = os.urandom(50_000)
+    file_server.files["model.safetensors"] = data
+    url = file_server.url("model.safetensors")
+    target = tmp_path / "model.safetensors"
+
+    partial = PartialDownload(target)
+    partial.reset(url, f'"{hashlib.md5(data).hexdigest()}"', None, len(data))
+    partial.part_path.write_bytes(data[:20_000])
+    partial.add_range(0, 20_000)
+    partial.save()
+
+    async with ModelManager(base_path=str(tmp_path), segments=1) as manager:
+        await manager.download_file(url, target)
+
+    assert target.read_bytes() == data
+    assert ("GET", "model.safetensors", "bytes=20000-") in file_server.requests
+    assert not partial.part_path.exists() and not partial.manifest_path.exists()
+
+@pytest.mark.asyncio
+async def test_blob_store_shared_between_installs(file_server, tmp_path, monkeypatch):
+    """Test a second install links from the store instead of downloading"""
+    monkeypatch.chdir(tmp_path)
+    data = os.urandom(10_000)
+    file_server.files["lora.safetensors"] = data
+    url = file_server.url("lora.safetensors")
+    store = BlobStore(str(tmp_path / "store"))
+
+    for install in ("a", "b"):
+        async with ModelManager(base_path=str(tmp_path / install), store=store) as manager:
+            await manager.download_file(url, tmp_path / install / "lora.safetensors")
+
+    first, second = tmp_path / "a" / "lora.safetensors", tmp_path / "b" / "lora.safetensors"
+    assert first.read_bytes() == second.read_bytes() == data
+    assert os.path.samefile(first, second)
+    assert [m for m, _, _ in file_server.requests].count("GET") == 1
+
+@pytest.mark.asyncio
+async def test_blob_store_remembers_concurrent_urls(tmp_path):
+    """Test parallel ingests from worker threads keep every URL in the index"""
+    store = BlobStore(str(tmp_path / "store"))
+    urls = [f"https://example.com/{i}.safetensors" for i in range(32)]
+    await asyncio.gather(*(asyncio.to_thread(store.remember, url, f"{i:064x}")
+                           for i, url in enumerate(urls)))
+    assert sorted(store.load_index()) == sorted(urls)
+
+def test_blob_store_ignores_url_with_other_digest(tmp_path):
+    """Test an expected SHA-256 is never answered with a different blob served by the URL"""
+    store = BlobStore(str(tmp_path / "store"))
+    url = "https://example.com/model.safetensors"
+    old = tmp_path / "old.safetensors"
+    old.write_bytes(b"old contents")
+    blob = store.ingest(old, url)
+
+    assert store.lookup(url) == blob
+    assert store.lookup(url, hashlib.sha256(b"new contents").hexdigest()) is None
+    assert store.lookup(url, blob.name) == blob
+
+@pytest.mark.asyncio
+async def test_checksum_mismatch_discards_partial(file_server, tmp_path, monkeypatch):
+    """Test a bad SHA-256 fails the download without leaving a file behind"""
+    monkeypatch.chdir(tmp_path)
+    data = os.urandom(10_000)
+    file_server.files["model.safetensors"] = data
+    target = tmp_path / "model.safetensors"
+
+    async with ModelManager(base_path=str(tmp_path)) as manager:
+        with pytest.raises(ChecksumError):
+            await manager.download_file(file_server.url("model.safetensors"), target, "0" * 64)
+        await manager.download_file(file_server.url("model.safetensors"), target,
+                                    hashlib.sha256(data).hexdigest())
+
+    assert target.read_bytes() == data
+    assert not PartialDownload(target).part_path.exists()
+
+@pytest.mark.asyncio
+async def test_download_manager_runs_batch_on_engine(file_server, tmp_path):
+    """Test the sync DownloadManager downloads a batch through the async engine"""
+    from src.download_manager import DownloadManager
+
+    payloads = {f"m{i}.safetensors": os.urandom(3_000 + i) for i in range(3)}
+    file_server.files.update(payloads)
+    download_list = [{'url': file_server.url(name), 'directory': 'models'} for name in payloads]
+    download_list.append({'url': file_server.url("missing.safetensors"), 'directory': 'models'})
+    download_list[0]['sha256'] = hashlib.sha256(payloads["m0.safetensors"]).hexdigest()
+
+    manager = DownloadManager(str(tmp_path), max_retries=1)
+    # The facade runs its own event loop, so keep it off the server's loop
+    results = await asyncio.to_thread(manager.process_download_list, download_list)
+
+    assert results['success'] == [str(tmp_path / "models" / name) for name in payloads]
+    assert results['failed'] == [file_server.url("missing.safetensors")]
+    for name, data in payloads.items():
+        assert (tmp_path / "models" / name).read_bytes() == data
+
+@pytest.mark.asyncio
+async def test_download_models_reports_failures(file_server, tmp_path, monkeypatch):
+    """Test download_models returns the URLs it could not fetch"""
+    monkeypatch.chdir(tmp_path)
+    file_server.files["ok.safetensors"] = os.urandom(1_000)
+    urls = [file_server.url("ok.safetensors"), file_server.url("missing.safetensors")]
+
+    async with ModelManager(base_path=str(tmp_path)) as manager:
+        assert await manager.download_models(model_urls=urls) == [urls[1]]
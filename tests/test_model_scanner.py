@@ -0,0 +1,89 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.http_cache import HttpCache
+from scripts.model_scanner import ModelScanner
+
+@pytest.mark.asyncio
+async def test_scan_repositories_runs_concurrently(tmp_path, monkeypatch):
+    """Test sources are fetched in parallel within the per-host cap"""
+    monkeypatch.chdir(tmp_path)
+    active = {"now": 0, "peak": 0}
+
+    async def handle(request):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.2)
+        active["now"] -= 1
+        return web.Response(text="<html></html>")
+
+    app = web.Application()
+    app.router.add_get('/{path:.*}', handle)
+    async with TestServer(app) as server:
+        urls = [str(server.make_url(path)) for path in (
+            "/Kosinkadink/ComfyUI-AnimateDiff-Evolved", "/cubiq/ComfyUI_IPAdapter_plus",
+            "/civitai/guide", "/missing")]
+        async with ModelScanner(max_per_host=2) as scanner:
+            started = time.monotonic()
+            models = await scanner.scan_repositories(urls)
+            elapsed = time.monotonic() - started
+
+    assert active["peak"] == 2
+    assert elapsed < 0.7
+    assert [m["type"] for m in models["animatediff"]] == ["motion_module"] * 3
+    assert models["ipadapter"] and models["loras"]
+
+@pytest.mark.asyncio
+async def test_fetch_timeout_returns_none(tmp_path, monkeypatch):
+    """Test a slow source is abandoned instead of stalling the scan"""
+    monkeypatch.chdir(tmp_path)
+
+    async def handle(request):
+        await asyncio.sleep(1)
+        return web.Response(text="late")
+
+    app = web.Application()
+    app.router.add_get('/slow', handle)
+    async with TestServer(app) as server:
+        async with ModelScanner(timeout=0.1) as scanner:
+            assert await scanner.fetch_url(str(server.make_url("/slow"))) is None
+
+@pytest.mark.asyncio
+async def test_unchanged_page_reuses_cached_models(tmp_path, monkeypatch):
+    """Test a 304 answer skips both the body download and parsing"""
+    monkeypatch.chdir(tmp_path)
+    statuses = []
+
+    async def handle(request):
+        if request.headers.get('If-None-Match') == '"v1"':
+            statuses.append(304)
+            return web.Response(status=304)
+        statuses.append(200)
+        return web.Response(text="<html>models</html>", headers={'ETag': '"v1"'})
+
+    app = web.Application()
+    app.router.add_get('/{path:.*}', handle)
+    async with TestServer(app) as server:
+        url = str(server.make_url("/Kosinkadink/ComfyUI-AnimateDiff-Evolved"))
+        cache = HttpCache(str(tmp_path / "cache"))
+        async with ModelScanner(cache=cache) as scanner:
+            first = await scanner.collect(url)
+
+        parsed = []
+        async with ModelScanner(cache=cache) as scanner:
+            original = scanner.parse
+            monkeypatch.setattr(scanner, "parse", lambda *args: parsed.append(args) or original(*args))
+            second = await scanner.collect(url)
+
+    assert statuses == [200, 304]
+    assert parsed == []
+    assert second == first and first["animatediff"]
@@ -0,0 +1,57 @@
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts import progress
+from scripts.progress import ProgressBus
+
+def test_progress_rate_and_eta(monkeypatch):
+    """Test per-file and aggregate progress with a smoothed rate"""
+    monkeypatch.setattr(progress, "RATE_WINDOW", 0)
+    bus = ProgressBus()
+    bus.start("a", "a.safetensors", 1000)
+    time.sleep(0.01)
+    bus.advance("a", 250)
+
+    snapshot = bus.snapshot()
+    entry = snapshot["files"][0]
+    assert entry["done"] == 250 and entry["rate"] > 0
+    assert entry["eta"] is not None
+    assert snapshot["aggregate"]["active"] == 1
+
+    bus.finish("a", "failed", "HTTP 503")
+    snapshot = bus.snapshot()
+    assert snapshot["files"][0]["status"] == "failed"
+    assert snapshot["aggregate"]["active"] == 0
+
+def test_stream_coalesces_updates():
+    """Test many updates between reads produce a single snapshot"""
+    bus = ProgressBus()
+    stream = bus.stream(min_interval=0)
+    bus.start("a", "a.safetensors", 10_000)
+    for _ in range(1000):
+        bus.advance("a", 10)
+    first = next(stream)
+    assert first["files"][0]["done"] == 10_000
+    assert bus.wait(first["version"], timeout=0.01) is None
+
+def test_stalled_transfer(monkeypatch):
+    """Test a transfer without new bytes loses its rate and is flagged stalled"""
+    monkeypatch.setattr(progress, "RATE_WINDOW", 0)
+    monkeypatch.setattr(progress, "STALL_AFTER", 0.05)
+    bus = ProgressBus()
+    stream = bus.stream(min_interval=0, refresh=0.01)
+    bus.start("a", "a.safetensors", 1000)
+    time.sleep(0.01)
+    bus.advance("a", 250)
+    first = next(stream)
+    assert first["files"][0]["rate"] > 0 and not first["files"][0]["stalled"]
+
+    time.sleep(0.06)
+    # Sent on the refresh timer although nothing changed
+    entry = next(stream)["files"][0]
+    assert entry["stalled"] and entry["rate"] == 0 and entry["eta"] is None
+    assert bus.snapshot()["aggregate"]["stalled"] == 1
@@ -0,0 +1,49 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import scripts.rate_limiter as rate_limiter
+from scripts.rate_limiter import TokenBucket, parse_rate, throttle
+
+def test_parse_rate():
+    """Test CLI rate strings are read as bytes per second"""
+    assert parse_rate("10M") == 10 * 2**20
+    assert parse_rate("500KB/s") == 500 * 2**10
+    assert parse_rate("2048") == 2048
+    assert parse_rate("0") is None
+    with pytest.raises(ValueError):
+        parse_rate("fast")
+
+@pytest.mark.asyncio
+async def test_bucket_shares_rate_fairly(monkeypatch):
+    """Test concurrent transfers split one bucket's rate evenly"""
+    monkeypatch.setattr(rate_limiter, "BURST_SECONDS", 0.0)
+    bucket = TokenBucket(400_000)
+    received = {"a": 0, "b": 0}
+
+    async def transfer(name):
+        while True:
+            await throttle([bucket], 10_000)
+            received[name] += 10_000
+
+    tasks = [asyncio.ensure_future(transfer(name)) for name in received]
+    start = time.monotonic()
+    await asyncio.sleep(0.5)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.monotonic() - start
+
+    total = sum(received.values())
+    assert total <= 400_000 * elapsed + 20_000
+    assert total >= 400_000 * elapsed * 0.7
+    assert abs(received["a"] - received["b"]) <= 10_000
+
+    # Lifting the cap takes effect for the next reservation
+    bucket.set_rate(None)
+    assert bucket.reserve(10**9) == 0.0
@@ -0,0 +1,131 @@
+import errno
+import os
+import sys
+from pathlib import Path
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+# Add the project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.download_engine import DownloadEngine
+from scripts.hashing import ChecksumError
+from scripts.retry_policy import (CircuitBreaker, CircuitOpenError, RetryPolicy, is_retryable,
+                                  retry_after)
+
+def response_error(status, headers=None):
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers or {})
+
+def test_retryable_errors():
+    """Test only transient failures are retried"""
+    assert is_retryable(response_error(503))
+    assert is_retryable(response_error(429))
+    assert not is_retryable(response_error(404))
+    assert is_retryable(aiohttp.ClientConnectionError())
+    assert is_retryable(IOError("ended early"))
+    assert not is_retryable(OSError(errno.ENOSPC, "No space left on device"))
+    assert not is_retryable(ChecksumError("bad digest"))
+
+def test_backoff_honours_retry_after():
+    """Test jittered backoff stays in bounds and defers to Retry-After"""
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.delay(attempt) <= min(4.0, 2 ** (attempt - 1)) for attempt in range(1, 6))
+    assert retry_after(response_error(503, {'Retry-After': '7'})) == 7.0
+    assert policy.delay(1, response_error(503, {'Retry-After': '7'})) == 7.0
+    assert not policy.should_retry(5, response_error(503))
+
+def test_circuit_breaker_half_open(monkeypatch):
+    """Test a failing host is shut out, then given one trial after the cooldown"""
+    now = [100.0]
+    monkeypatch.setattr("scripts.retry_policy.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, cooldown=10)
+    breaker.record_failure("a.com")
+    assert breaker.allow("a.com")
+    breaker.record_failure("a.com")
+    assert breaker.is_open("a.com") and not breaker.allow("a.com")
+    now[0] += 11
+    assert breaker.allow("a.com") and not breaker.allow("a.com")
+    breaker.record_success("a.com")
+    assert breaker.allow("a.com")
+
+@pytest.mark.asyncio
+async def test_engine_retries_503_and_opens_circuit(tmp_path):
+    """Test transient errors are retried and a dead host stops taking slots"""
+    data = os.urandom(4_000)
+    calls = {"flaky": 0, "dead": 0}
+
+    async def flaky(request):
+        if request.method == "HEAD":
+            return web.Response(status=503)
+        calls["flaky"] += 1
+        if calls["flaky"] <= 2:
+            return web.Response(status=503, headers={'Retry-After': '0'})
+        return web.Response(body=data)
+
+    async def dead(request):
+        calls["dead"] += request.method == "GET"
+        return web.Response(status=502)
+
+    app = web.Application()
+    app.router.add_get('/flaky', flaky)
+    app.router.add_route('*', '/dead/{name}', dead)
+    async with TestServer(app) as server:
+        async with DownloadEngine(max_concurrent=1, retry_policy=RetryPolicy(3, base_delay=0),
+                                  breaker=CircuitBreaker(threshold=3, cooldown=0.05, max_trips=2)) as engine:
+            digest = await engine.download("flaky", str(server.make_url("/flaky")), tmp_path / "flaky.bin")
+            assert (tmp_path / "flaky.bin").read_bytes() == data and digest is None
+
+            # Use another host name so the dead host's breaker is separate
+            dead_urls = [str(server.make_url(f"/dead/{i}")).replace("127.0.0.1", "localhost") for i in range(3)]
+            results = await engine.download_all([{"url": url, "target_path": tmp_path / f"dead{i}"}
+                                                 for i, url in enumerate(dead_urls)])
+
+    assert calls["flaky"] == 3
+    # Three failures open the circuit, one trial after the cooldown fails it
+    # for good, and nothing else is sent to the dead host
+    assert calls["dead"] == 4
+    assert isinstance(results[0][1], aiohttp.ClientResponseError)
+    assert all(isinstance(outcome, CircuitOpenError) for _, outcome in results[1:])
+
+@pytest.mark.asyncio
+async def test_queued_jobs_wait_out_an_open_circuit(tmp_path):
+    """Test a short outage pauses a host's downloads instead of failing them"""
+    data = os.urandom(4_000)
+    calls = {"get": 0}
+
+    async def blip(request):
+        if request.method == "HEAD":
+            return web.Response(status=503)
+        calls["get"] += 1
+        if calls["get"] <= 2:
+            return web.Response(status=503)
+        return web.Response(body=data)
+
+    app = web.Application()
+    app.router.add_route('*', '/blip/{name}', blip)
+    async with TestServer(app) as server:
+        async with DownloadEngine(max_concurrent=4, retry_policy=RetryPolicy(2, base_delay=0),
+                                  breaker=CircuitBreaker(threshold=2, cooldown=0.05)) as engine:
+            results = await engine.download_all([{"url": str(server.make_url(f"/blip/{i}")),
+                                                  "target_path": tmp_path / f"blip{i}"} for i in range(4)])
+
+    assert [outcome for _, outcome in results] == [None] * 4
+    assert all((tmp_path / f"blip{i}").read_bytes() == data for i in range(4))
+
+def test_circuit_breaker_gives_up_after_max_trips(monkeypatch):
+    """Test a host is only given up after its circuit opened max_trips times"""
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=1, cooldown=10, max_trips=2)
+    breaker.record_failure("a.com")
+    breaker.record_failure("a.com")  # an in-flight transfer failing too is not another trip
+    assert breaker.tripped("a.com") and not breaker.exhausted("a.com")
+    now[0] = 11
+    assert breaker.allow("a.com")
+    breaker.record_failure("a.com")
+    assert breaker.exhausted("a.com")
+    breaker.record_success("a.com")
+    assert not breaker.exhausted("a.com") and not breaker.tripped("a.com")